@@ -0,0 +1,86 @@
+"""
+Compares the shards verification by reconstructing every public key
+with the verification of the random linear combination (verify-shard-pubkeys --fast).
+
+Usage: WORKERS_COUNT=1 python scripts/benchmark_verify_shards.py
+"""
+import time
+from typing import Callable, Dict, List, Tuple
+
+from eth_typing import BLSPubkey
+from py_ecc.bls import G2ProofOfPossession
+
+from stakewise_cli.committee_shares import (
+    generate_bls_priv_key,
+    get_bls_secret_shares,
+    get_pubkey_point,
+    reconstruct_shared_bls_public_keys,
+    verify_shared_bls_public_keys,
+)
+
+KEYS_COUNTS = [20, 200, 1000]
+MEMBERS_COUNT = 5
+SHARDS_INDEXES = [0, 2, 4]
+
+
+def generate_shards(
+    count: int,
+) -> Tuple[Dict[int, List[BLSPubkey]], List[BLSPubkey]]:
+    private_keys = [generate_bls_priv_key() for _ in range(count)]
+    members_private_keys = list(
+        zip(
+            *[
+                get_bls_secret_shares(key, total=MEMBERS_COUNT, threshold=3)
+                for key in private_keys
+            ]
+        )
+    )
+    shards = {
+        index: [G2ProofOfPossession.SkToPk(key) for key in members_private_keys[index]]
+        for index in SHARDS_INDEXES
+    }
+    return shards, [G2ProofOfPossession.SkToPk(key) for key in private_keys]
+
+
+def verify_with_reconstruction(
+    shards: Dict[int, List[BLSPubkey]], public_keys: List[BLSPubkey]
+) -> None:
+    reconstructed_public_keys = reconstruct_shared_bls_public_keys(shards)
+    assert list(reconstructed_public_keys) == public_keys
+
+
+def verify_with_linear_combination(
+    shards: Dict[int, List[BLSPubkey]], public_keys: List[BLSPubkey]
+) -> None:
+    assert verify_shared_bls_public_keys(shards, public_keys) is None
+
+
+def measure(
+    verify: Callable, shards: Dict[int, List[BLSPubkey]], public_keys: List[BLSPubkey]
+) -> float:
+    # the decompressed points must not be reused between the runs
+    get_pubkey_point.cache_clear()
+    start = time.perf_counter()
+    verify(shards, public_keys)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    results = []
+    for count in KEYS_COUNTS:
+        shards, public_keys = generate_shards(count)
+        results.append(
+            (
+                count,
+                measure(verify_with_reconstruction, shards, public_keys),
+                measure(verify_with_linear_combination, shards, public_keys),
+            )
+        )
+
+    print(f"{'keys':>10} {'reconstruct, s':>18} {'fast, s':>10}")
+    for count, reconstruct_time, fast_time in results:
+        print(f"{count:>10} {reconstruct_time:>18.2f} {fast_time:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
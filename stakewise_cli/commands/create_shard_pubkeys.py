@@ -1,10 +1,21 @@
+from concurrent.futures import ProcessPoolExecutor
+
 import click
-from Crypto.Cipher import AES, PKCS1_OAEP
 from Crypto.PublicKey import RSA
+from eth_typing import HexStr
 from py_ecc.bls import G2ProofOfPossession
 from web3 import Web3
 
 from stakewise_cli.ipfs import upload_to_ipfs
+from stakewise_cli.settings import WORKERS_COUNT
+from stakewise_cli.shards import read_shard_file
+from stakewise_cli.typings import BLSPrivkey
+
+PUBLIC_KEYS_CHUNK_SIZE = 100
+
+
+def _get_public_key(private_key: BLSPrivkey) -> HexStr:
+    return Web3.toHex(G2ProofOfPossession.SkToPk(private_key))
 
 
 def validate_private_key(ctx, param, value) -> str:
@@ -34,41 +45,22 @@ def validate_private_key(ctx, param, value) -> str:
     type=click.Path(exists=True, file_okay=True, dir_okay=False),
 )
 def create_shard_pubkeys(shard: str, private_key: str) -> None:
-    try:
-        with open(private_key, "r") as f:
-            rsa_key = RSA.import_key(f.read())
-        with open(shard, "rb") as f:
-            enc_session_key, nonce, tag, ciphertext = [
-                f.read(x) for x in (rsa_key.size_in_bytes(), 16, 16, -1)
-            ]
-    except:  # noqa: E722
-        raise click.ClickException("Invalid operator shard file")
-
-    # Decrypt the session key with the private RSA key
-    try:
-        cipher_rsa = PKCS1_OAEP.new(rsa_key)
-        session_key = cipher_rsa.decrypt(enc_session_key)
-    except:  # noqa: E722
-        raise click.ClickException(
-            "Failed to decrypt the session key. Please check whether the paths to private key and shard"
-        )
-
-    # Decrypt the data with the AES session key
-    cipher_aes = AES.new(session_key, AES.MODE_EAX, nonce)
-    try:
-        private_keys = cipher_aes.decrypt_and_verify(ciphertext, tag).split(b",")
-    except:  # noqa: E722
-        raise click.ClickException("Failed to decrypt the shard file. Is it corrupted?")
+    with open(private_key, "r") as f:
+        rsa_key = RSA.import_key(f.read())
 
-    public_keys = []
-    with click.progressbar(
-        private_keys,
-        label="Deriving public keys for operator shard\t\t",
-        show_percent=False,
-        show_pos=True,
-    ) as _private_keys:
-        for priv_key in _private_keys:
-            public_keys.append(Web3.toHex(G2ProofOfPossession.SkToPk(int(priv_key))))
+    # derive public keys in parallel, the order of the shares is preserved
+    with ProcessPoolExecutor(max_workers=WORKERS_COUNT) as executor:
+        with click.progressbar(
+            executor.map(
+                _get_public_key,
+                read_shard_file(shard, rsa_key),
+                chunksize=PUBLIC_KEYS_CHUNK_SIZE,
+            ),
+            label="Deriving public keys for operator shard\t\t",
+            show_percent=False,
+            show_pos=True,
+        ) as _public_keys:
+            public_keys = list(_public_keys)
 
     ipfs_hash = upload_to_ipfs(public_keys)
     click.echo(
@@ -1,11 +1,21 @@
+import os
+from typing import Optional
+
 import click
 from eth_typing import ChecksumAddress
+from py_ecc.bls import G2ProofOfPossession
+from web3 import Web3
 
+from stakewise_cli.encoder import Decoder
 from stakewise_cli.eth2 import prompt_beacon_client, validate_mnemonic
 from stakewise_cli.networks import AVAILABLE_NETWORKS, MAINNET
 from stakewise_cli.storages.database import Database, check_db_connection
 from stakewise_cli.transfers import decrypt_transferred_keys
-from stakewise_cli.validators import validate_db_uri, validate_operator_address
+from stakewise_cli.validators import (
+    validate_db_uri,
+    validate_operator_address,
+    validate_optional_env_name,
+)
 from stakewise_cli.web3signer import Web3SignerManager
 
 
@@ -49,6 +59,13 @@ from stakewise_cli.web3signer import Web3SignerManager
     help="The RSA private key to decrypt validators private keys.",
     type=click.Path(exists=True, file_okay=True, dir_okay=False),
 )
+@click.option(
+    "--encryption-key-env",
+    help="The environment variable with the current 'DECRYPTION_KEY' value. When provided,"
+    " the keys already in the database are not re-encrypted and only the changed keys are written."
+    " Otherwise, all the keys are re-encrypted with a new key and rewritten.",
+    callback=validate_optional_env_name,
+)
 def sync_db(
     network: str,
     operator: ChecksumAddress,
@@ -56,9 +73,31 @@ def sync_db(
     validator_capacity: int,
     private_keys_dir: str,
     decrypt_key: str,
+    encryption_key_env: Optional[str],
 ) -> None:
     check_db_connection(db_url)
 
+    encryption_key = os.environ[encryption_key_env] if encryption_key_env else None
+    with Database(db_url=db_url) as database:
+        if encryption_key:
+            _check_encryption_key(database, encryption_key)
+        elif database.fetch_first_key() is not None:
+            click.secho(
+                "All the keys will be re-encrypted with a new key and rewritten."
+                " Pass '--encryption-key-env' with the current 'DECRYPTION_KEY'"
+                " to write only the changed keys.",
+                fg="red",
+            )
+
+        # the readers of the previous versions fail to read the migrated keys table
+        if not database.is_keys_table_migrated():
+            click.confirm(
+                "The keys table will be converted to the new format, which the previous"
+                " versions of 'sync-validator-keys' and 'sync-web3signer-keys' can't read."
+                " Have the validators and web3signer init containers been upgraded?",
+                abort=True,
+            )
+
     beacon_client = prompt_beacon_client(network)
 
     mnemonic = click.prompt(
@@ -74,11 +113,8 @@ def sync_db(
         mnemonic=mnemonic,
         validator_capacity=validator_capacity,
         beacon=beacon_client,
+        encryption_key=encryption_key,
     )
-    database = Database(
-        db_url=db_url,
-    )
-
     click.confirm(
         f"Synced {len(web3signer.keys)} key pairs, apply changes to the database?",
         default=True,
@@ -96,7 +132,8 @@ def sync_db(
             default=True,
             abort=True,
         )
-    database.update_keys(keys=keys)
+    with Database(db_url=db_url) as database:
+        database.update_keys(keys=keys, reencrypt=encryption_key is None)
 
     click.secho(
         f"The database contains {len(web3signer.keys)} validator keys.\n"
@@ -105,3 +142,23 @@ def sync_db(
         bold=True,
         fg="green",
     )
+
+
+def _check_encryption_key(database: Database, encryption_key: str) -> None:
+    """Checks that the keys in the database are encrypted with the encryption key."""
+    key_record = database.fetch_first_key()
+    if key_record is None:
+        return
+
+    try:
+        private_key = Decoder(encryption_key).decrypt(
+            data=key_record["private_key"], nonce=key_record["nonce"]
+        )
+        public_key = Web3.toHex(G2ProofOfPossession.SkToPk(int(private_key)))
+    except ValueError:
+        public_key = None
+
+    if public_key != key_record["public_key"]:
+        raise click.ClickException(
+            "The keys in the database are not encrypted with the provided encryption key"
+        )
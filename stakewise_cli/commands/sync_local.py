@@ -3,7 +3,13 @@ import os
 import click
 from eth_typing import ChecksumAddress
 
-from stakewise_cli.eth2 import validate_mnemonic
+from stakewise_cli.eth2 import (
+    DEFAULT_KDF_COST,
+    KDF_SCRYPT,
+    KEYSTORE_KDFS,
+    validate_kdf_cost,
+    validate_mnemonic,
+)
 from stakewise_cli.networks import AVAILABLE_NETWORKS, MAINNET
 from stakewise_cli.storages.local import LocalStorage
 from stakewise_cli.validators import validate_operator_address
@@ -32,7 +38,34 @@ from stakewise_cli.validators import validate_operator_address
     help="The folder where validator keys will be saved.",
     type=click.Path(exists=False, file_okay=False, dir_okay=True),
 )
-def sync_local(network: str, operator: ChecksumAddress, folder: str) -> None:
+@click.option(
+    "--incremental",
+    is_flag=True,
+    help="Adds only the missing keystores to the existing folder.",
+)
+@click.option(
+    "--keystore-kdf",
+    default=KDF_SCRYPT,
+    help="The key derivation function used to encrypt the keystores.",
+    type=click.Choice(KEYSTORE_KDFS, case_sensitive=False),
+    # the KDF cost is validated against the resolved KDF
+    is_eager=True,
+)
+@click.option(
+    "--keystore-kdf-cost",
+    default=DEFAULT_KDF_COST,
+    help="The scrypt N parameter or the pbkdf2 iterations count of the keystores.",
+    type=click.INT,
+    callback=validate_kdf_cost,
+)
+def sync_local(
+    network: str,
+    operator: ChecksumAddress,
+    folder: str,
+    incremental: bool,
+    keystore_kdf: str,
+    keystore_kdf_cost: int,
+) -> None:
     mnemonic = click.prompt(
         'Enter your mnemonic separated by spaces (" ")',
         value_proc=validate_mnemonic,
@@ -44,6 +77,9 @@ def sync_local(network: str, operator: ChecksumAddress, folder: str) -> None:
         operator=operator,
         network=network,
         mnemonic=mnemonic,
+        incremental=incremental,
+        keystore_kdf=keystore_kdf,
+        keystore_kdf_cost=keystore_kdf_cost,
     )
 
     local_storage.apply_local_changes()
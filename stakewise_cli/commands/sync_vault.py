@@ -4,10 +4,21 @@ from hvac import Client as VaultClient
 from hvac.exceptions import InvalidRequest
 from requests.exceptions import ConnectionError
 
-from stakewise_cli.eth2 import prompt_beacon_client, validate_mnemonic
+from stakewise_cli.eth2 import (
+    DEFAULT_KDF_COST,
+    KDF_SCRYPT,
+    KEYSTORE_KDFS,
+    prompt_beacon_client,
+    validate_kdf_cost,
+    validate_mnemonic,
+)
 from stakewise_cli.networks import AVAILABLE_NETWORKS, MAINNET
 from stakewise_cli.settings import VAULT_VALIDATORS_MOUNT_POINT
-from stakewise_cli.storages.vault import Vault
+from stakewise_cli.storages.vault import (
+    KEYSTORES_LAYOUT_SINGLE,
+    KEYSTORES_LAYOUTS,
+    Vault,
+)
 from stakewise_cli.validators import validate_operator_address
 
 
@@ -42,7 +53,42 @@ def get_kubernetes_api_server() -> str:
     prompt="Enter your operator wallet address",
     callback=validate_operator_address,
 )
-def sync_vault(network: str, operator: ChecksumAddress) -> None:
+@click.option(
+    "--rebalance",
+    is_flag=True,
+    help="Moves the minimal number of keys between the validators to distribute them evenly.",
+)
+@click.option(
+    "--keystores-layout",
+    default=KEYSTORES_LAYOUT_SINGLE,
+    help="The layout of the validator keystores in the vault. The per-keystore layout"
+    " stores every keystore in a separate secret. The existing validators are migrated"
+    " to the selected layout.",
+    type=click.Choice(KEYSTORES_LAYOUTS, case_sensitive=False),
+)
+@click.option(
+    "--keystore-kdf",
+    default=KDF_SCRYPT,
+    help="The key derivation function used to encrypt the keystores.",
+    type=click.Choice(KEYSTORE_KDFS, case_sensitive=False),
+    # the KDF cost is validated against the resolved KDF
+    is_eager=True,
+)
+@click.option(
+    "--keystore-kdf-cost",
+    default=DEFAULT_KDF_COST,
+    help="The scrypt N parameter or the pbkdf2 iterations count of the keystores.",
+    type=click.INT,
+    callback=validate_kdf_cost,
+)
+def sync_vault(
+    network: str,
+    operator: ChecksumAddress,
+    rebalance: bool,
+    keystores_layout: str,
+    keystore_kdf: str,
+    keystore_kdf_cost: int,
+) -> None:
     while True:
         try:
             vault_client = get_vault_client()
@@ -112,6 +158,10 @@ def sync_vault(network: str, operator: ChecksumAddress) -> None:
         network=network,
         mnemonic=mnemonic,
         namespace=namespace,
+        rebalance=rebalance,
+        keystores_layout=keystores_layout,
+        keystore_kdf=keystore_kdf,
+        keystore_kdf_cost=keystore_kdf_cost,
     )
 
     vault.apply_vault_changes()
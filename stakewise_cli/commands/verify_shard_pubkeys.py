@@ -1,26 +1,38 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
 import click
 from eth_typing import BLSPubkey
 from web3 import Web3
 
-from stakewise_cli.committee_shares import reconstruct_shared_bls_public_key
+from stakewise_cli.committee_shares import (
+    reconstruct_shared_bls_public_keys,
+    verify_shared_bls_public_keys,
+)
 from stakewise_cli.ipfs import ipfs_fetch
+from stakewise_cli.settings import WORKERS_COUNT
+from stakewise_cli.validators import validate_shards
 
+VERIFY_CHUNK_SIZE = 100
 
-@click.command(help="Verifies public keys for operator shards")
-@click.option(
-    "--deposit-data-ipfs-hash",
-    help="IPFS hash for operator deposit data to verify.",
-    prompt="Enter IPFS hash for operator deposit data to verify",
-)
-@click.option(
-    "--shards-count",
-    help="Total number of shards to verify. With 5 committee members, the number must be at least 3.",
-    prompt="Enter total number of shards to verify",
-    type=int,
-)
-def verify_shard_pubkeys(deposit_data_ipfs_hash: str, shards_count: int) -> None:
+
+def _fetch_public_keys(ipfs_hash: str) -> List[BLSPubkey]:
+    return [BLSPubkey(Web3.toBytes(hexstr=k)) for k in ipfs_fetch(ipfs_hash)]
+
+
+def _fetch_deposit_data_public_keys(ipfs_hash: str) -> List[BLSPubkey]:
+    try:
+        deposit_data = ipfs_fetch(ipfs_hash)
+        return [BLSPubkey(Web3.toBytes(hexstr=d["public_key"])) for d in deposit_data]
+    except:  # noqa: E722
+        raise click.ClickException(
+            f"Failed to fetch IPFS data at {ipfs_hash}. Please try again."
+        )
+
+
+def _prompt_shards(shards_count: int) -> Dict[int, List[BLSPubkey]]:
     submitted = 0
-    shards = {}
+    shards: Dict[int, List[BLSPubkey]] = {}
     while True:
         if submitted == shards_count:
             break
@@ -30,7 +42,7 @@ def verify_shard_pubkeys(deposit_data_ipfs_hash: str, shards_count: int) -> None
                 "Enter committee member position number "
                 "(index in stakewise.eth ENS record)"
             ),
-            type=click.INT,
+            type=click.IntRange(min=0),
         )
         if index in shards:
             click.echo("The IPFS hash for such index was already submitted")
@@ -45,8 +57,7 @@ def verify_shard_pubkeys(deposit_data_ipfs_hash: str, shards_count: int) -> None
         ).strip()
 
         try:
-            pub_keys = ipfs_fetch(public_keys_ipfs_hash)
-            shards[index] = [Web3.toBytes(hexstr=k) for k in pub_keys]
+            shards[index] = _fetch_public_keys(public_keys_ipfs_hash)
         except:  # noqa: E722
             click.secho(
                 f"Failed to fetch IPFS data at {public_keys_ipfs_hash}. Please try again.",
@@ -56,31 +67,130 @@ def verify_shard_pubkeys(deposit_data_ipfs_hash: str, shards_count: int) -> None
 
         submitted += 1
 
-    try:
-        deposit_data = ipfs_fetch(deposit_data_ipfs_hash)
-        deposit_data_pub_keys = [
-            Web3.toBytes(hexstr=d["public_key"]) for d in deposit_data
-        ]
-    except:  # noqa: E722
-        raise click.ClickException(
-            f"Failed to fetch IPFS data at {deposit_data_ipfs_hash}. Please try again."
+    return shards
+
+
+def _find_invalid_public_key(
+    shards: Dict[int, List[BLSPubkey]], public_keys: List[BLSPubkey], offset: int
+) -> Optional[int]:
+    """Returns index of the first public key that the shards fail to reconstruct."""
+    reconstructed_public_keys = reconstruct_shared_bls_public_keys(shards)
+    for i, (public_key, reconstructed_public_key) in enumerate(
+        zip(public_keys, reconstructed_public_keys)
+    ):
+        if reconstructed_public_key != public_key:
+            return offset + i
+
+    return None
+
+
+@click.command(help="Verifies public keys for operator shards")
+@click.option(
+    "--deposit-data-ipfs-hash",
+    help="IPFS hash for operator deposit data to verify.",
+    prompt="Enter IPFS hash for operator deposit data to verify",
+)
+@click.option(
+    "--shards-count",
+    help="Total number of shards to verify. With 5 committee members, the number must be at least 3.",
+    type=click.IntRange(min=1),
+    # the number of the shards is validated against the shards count
+    is_eager=True,
+)
+@click.option(
+    "--shards",
+    "shards_hashes",
+    help="Comma-separated committee member positions and their shard public keys"
+    " IPFS hashes, ex. '0=QmHash0,2=QmHash2,4=QmHash4'.",
+    callback=validate_shards,
+)
+@click.option(
+    "--fast",
+    is_flag=True,
+    help="Verifies all the public keys at once with a random linear combination"
+    " instead of reconstructing every public key.",
+)
+def verify_shard_pubkeys(
+    deposit_data_ipfs_hash: str,
+    shards_count: Optional[int],
+    shards_hashes: Optional[Dict[int, str]],
+    fast: bool,
+) -> None:
+    with ThreadPoolExecutor(max_workers=len(shards_hashes or {}) + 1) as executor:
+        # fetch deposit data in the background
+        deposit_data_future = executor.submit(
+            _fetch_deposit_data_public_keys, deposit_data_ipfs_hash
         )
 
+        shards: Dict[int, List[BLSPubkey]] = {}
+        if shards_hashes:
+            shards_futures = {
+                index: executor.submit(_fetch_public_keys, ipfs_hash)
+                for index, ipfs_hash in shards_hashes.items()
+            }
+            for index, shard_future in shards_futures.items():
+                try:
+                    shards[index] = shard_future.result()
+                except:  # noqa: E722
+                    raise click.ClickException(
+                        f"Failed to fetch IPFS data at {shards_hashes[index]}."
+                        f" Please try again."
+                    )
+        else:
+            if shards_count is None:
+                shards_count = click.prompt(
+                    "Enter total number of shards to verify", type=int
+                )
+            shards = _prompt_shards(shards_count)
+
+        deposit_data_pub_keys = deposit_data_future.result()
+
+    for index, pub_keys in shards.items():
+        if len(pub_keys) != len(deposit_data_pub_keys):
+            raise click.ClickException(
+                f"Invalid number of public keys for {index} committee member:"
+                f" expected {len(deposit_data_pub_keys)}, got {len(pub_keys)}"
+            )
+
+    if fast:
+        invalid_index = verify_shared_bls_public_keys(shards, deposit_data_pub_keys)
+        if invalid_index is not None:
+            raise click.ClickException(
+                f"Failed to reconstruct public key with index {invalid_index}"
+            )
+
+        click.secho("Successfully verified operator shards", fg="green")
+        return
+
+    # reconstruct public keys in parallel by chunks
+    invalid_indexes = []
     with click.progressbar(
-        enumerate(deposit_data_pub_keys),
+        length=len(deposit_data_pub_keys),
         label="Reconstructing public keys from shards\t\t",
         show_percent=False,
         show_pos=True,
-    ) as _deposit_data_pub_keys:
-        for i, pub_key in _deposit_data_pub_keys:
-            pub_key_shards = {}
-            for committee_index in shards:
-                pub_key_shards[committee_index] = BLSPubkey(shards[committee_index][i])
-
-            reconstructed_pub_key = reconstruct_shared_bls_public_key(pub_key_shards)
-            if reconstructed_pub_key != pub_key:
-                raise click.ClickException(
-                    f"Failed to reconstruct public key with index {i}"
-                )
+    ) as bar, ProcessPoolExecutor(max_workers=WORKERS_COUNT) as executor:
+        verify_futures = {
+            executor.submit(
+                _find_invalid_public_key,
+                {
+                    index: pub_keys[i : i + VERIFY_CHUNK_SIZE]
+                    for index, pub_keys in shards.items()
+                },
+                deposit_data_pub_keys[i : i + VERIFY_CHUNK_SIZE],
+                i,
+            ): min(VERIFY_CHUNK_SIZE, len(deposit_data_pub_keys) - i)
+            for i in range(0, len(deposit_data_pub_keys), VERIFY_CHUNK_SIZE)
+        }
+        for verify_future in as_completed(verify_futures):
+            invalid_index = verify_future.result()
+            if invalid_index is not None:
+                invalid_indexes.append(invalid_index)
+            bar.update(verify_futures[verify_future])
+
+    if invalid_indexes:
+        raise click.ClickException(
+            f"Failed to reconstruct public key with index {min(invalid_indexes)}"
+        )
 
     click.secho("Successfully verified operator shards", fg="green")
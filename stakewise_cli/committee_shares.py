@@ -1,25 +1,57 @@
+import math
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from os import mkdir
 from os.path import exists, join
-from secrets import randbits
-from typing import Dict, List, Tuple, cast
+from secrets import randbelow, randbits
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, cast
 
 import click
-from Crypto.Cipher import AES, PKCS1_OAEP
+from Crypto.Cipher import AES
 from Crypto.Cipher._mode_eax import EaxMode
-from Crypto.PublicKey import RSA
 from Crypto.Random import get_random_bytes
 from eth_typing import BLSPubkey, ChecksumAddress
 from gql import Client
 from py_ecc.bls.ciphersuites import G2ProofOfPossession
 from py_ecc.bls.g2_primitives import G1_to_pubkey, pubkey_to_G1
-from py_ecc.optimized_bls12_381.optimized_curve import Z1, add, curve_order, multiply
+from py_ecc.fields import optimized_bls12_381_FQ as FQ
+from py_ecc.optimized_bls12_381.optimized_curve import (
+    Z1,
+    add,
+    curve_order,
+    double,
+    field_modulus,
+    is_inf,
+    multiply,
+    neg,
+    normalize,
+)
+from py_ecc.typing import Optimized_Point3D
 from py_ecc.utils import prime_field_inv
 
 from stakewise_cli.eth1 import get_operator_allocation_id, get_operators_committee
+from stakewise_cli.settings import WORKERS_COUNT
+from stakewise_cli.shards import get_rsa_cipher, write_shard_file
 from stakewise_cli.typings import BLSPrivkey, KeyPair
+from stakewise_cli.utils import chunkify
 
 PRIME = curve_order
 
+# the number of points from which the buckets method is used for the MSM
+PIPPENGER_MIN_POINTS = 16
+PUBKEY_POINTS_CACHE_SIZE = 1 << 16
+
+# the upper bound for the random weights used in the aggregate verification
+RANDOM_WEIGHT_MAX = 2**128 - 1
+
+# the absolute value of the BLS12-381 curve parameter
+BLS_X = 0xD201000000010000
+# the cube root of unity of the G1 endomorphism (x, y) -> (beta * x, y),
+# which multiplies the G1 points by -x**2
+G1_ENDOMORPHISM_BETA = (
+    0x5F19672FDF76CE51BA69C6076A0F77EADDB3A93BE6F89688DE17D813620A00022E01FFFFFFFEFFFE
+)
+
 
 def get_polynomial_points(
     coefficients: List[BLSPrivkey], num_points: int
@@ -63,8 +95,7 @@ def rsa_encrypt(
     recipient_public_key: str, data: str
 ) -> Tuple[bytes, bytes, bytes, bytes]:
     """Encrypts data with rsa public key."""
-    public_key = RSA.import_key(recipient_public_key)
-    cipher_rsa = PKCS1_OAEP.new(public_key)
+    cipher_rsa = get_rsa_cipher(recipient_public_key)
     session_key = get_random_bytes(32)
 
     # Encrypt the session key with the public RSA key
@@ -76,35 +107,29 @@ def rsa_encrypt(
     return enc_session_key, cipher_aes.nonce, tag, ciphertext
 
 
-def create_committee_shares(
-    network: str,
-    gql_client: Client,
-    operator: ChecksumAddress,
-    committee_folder: str,
-    keypairs: List[KeyPair],
-) -> Dict[str, str]:
-    if not exists(committee_folder):
-        mkdir(committee_folder)
-
-    committee = get_operators_committee(network)
-    committee_final_shares: List[List[List]] = [
-        [[] for _ in range(len(committee[i]))] for i in range(len(committee))
+def get_keypairs_shares(
+    private_keys: List[BLSPrivkey], committee_sizes: List[int]
+) -> List[List[List[BLSPrivkey]]]:
+    """
+    Generates shares of the private keys for every committee member.
+    Returns shares grouped by committee and member indexes.
+    """
+    committee_shares_total = len(committee_sizes)
+    members_final_shares: List[List[List[BLSPrivkey]]] = [
+        [[] for _ in range(size)] for size in committee_sizes
     ]
-    for keypair in keypairs:
-        committee_shares_total = len(committee)
+    for private_key in private_keys:
         if committee_shares_total > 1:
             committee_shares = get_bls_secret_shares(
-                private_key=keypair["private_key"],
+                private_key=private_key,
                 total=committee_shares_total,
                 threshold=committee_shares_total,
             )
-        elif committee_shares_total == 1:
-            committee_shares = [keypair["private_key"]]
         else:
-            raise click.ClickException(f"Invalid committee: {committee}")
+            committee_shares = [private_key]
 
         for i, committee_share in enumerate(committee_shares):
-            members_shares_total = len(committee[i])
+            members_shares_total = committee_sizes[i]
             members_shares_threshold = (members_shares_total // 2) + 1
             members_shares = get_bls_secret_shares(
                 private_key=committee_share,
@@ -112,56 +137,351 @@ def create_committee_shares(
                 threshold=members_shares_threshold,
             )
             for j, member_share in enumerate(members_shares):
-                committee_final_shares[i][j].append(member_share)
+                members_final_shares[i][j].append(member_share)
+
+    return members_final_shares
+
+
+def create_committee_shares(
+    network: str,
+    gql_client: Client,
+    operator: ChecksumAddress,
+    committee_folder: str,
+    keypairs: List[KeyPair],
+) -> Dict[str, str]:
+    if not exists(committee_folder):
+        mkdir(committee_folder)
+
+    committee = get_operators_committee(network)
+    if not committee:
+        raise click.ClickException(f"Invalid committee: {committee}")
+
+    committee_sizes = [len(committee[i]) for i in range(len(committee))]
+    committee_final_shares: List[List[List[BLSPrivkey]]] = [
+        [[] for _ in range(size)] for size in committee_sizes
+    ]
+
+    # split keypairs between the workers and merge their shares in the same order
+    private_keys = [keypair["private_key"] for keypair in keypairs]
+    chunk_size = max(math.ceil(len(private_keys) / WORKERS_COUNT), 1)
+    with click.progressbar(
+        length=len(private_keys),
+        label="Generating validator key shares\t\t",
+        show_percent=False,
+        show_pos=True,
+    ) as bar, ProcessPoolExecutor(max_workers=WORKERS_COUNT) as executor:
+        futures = [
+            (
+                len(chunk),
+                executor.submit(get_keypairs_shares, list(chunk), committee_sizes),
+            )
+            for chunk in chunkify(private_keys, chunk_size)
+        ]
+        for chunk_length, future in futures:
+            chunk_shares = future.result()
+            for i in range(len(committee_sizes)):
+                for j in range(committee_sizes[i]):
+                    committee_final_shares[i][j].extend(chunk_shares[i][j])
+            bar.update(chunk_length)
 
     allocation_id = get_operator_allocation_id(gql_client, operator)
     allocation_name = f"{operator.lower()[2:10]}-{allocation_id}"
 
     committee_paths = {}
-    members_count = sum([len(committee[i]) for i in range(len(committee))])
+    members_count = sum(committee_sizes)
     formatted_network = network.replace("_", "-").lower()
     with click.progressbar(
         length=members_count,
         label="Creating validator key shares\t\t",
         show_percent=False,
         show_pos=True,
-    ) as bar:
+    ) as bar, ThreadPoolExecutor(max_workers=WORKERS_COUNT) as executor:
+        save_futures = []
         for i in range(len(committee)):
             for j in range(len(committee[i])):
-                secret = ",".join(str(share) for share in committee_final_shares[i][j])
                 rsa_pub_key = committee[i][j]
                 member_handler = rsa_pub_key.split(" ")[-1]
                 filename = (
                     f"{member_handler}-{allocation_name}-{formatted_network}.shard"
                 )
-                enc_session_key, nonce, tag, ciphertext = rsa_encrypt(
-                    recipient_public_key=rsa_pub_key,
-                    data=secret,
-                )
                 file_path = join(committee_folder, filename)
-                with open(file_path, "wb") as f:
-                    for data in (enc_session_key, nonce, tag, ciphertext):
-                        f.write(data)
-
+                save_futures.append(
+                    executor.submit(
+                        write_shard_file,
+                        file_path=file_path,
+                        recipient_public_key=rsa_pub_key,
+                        shares=committee_final_shares[i][j],
+                    )
+                )
                 committee_paths[member_handler] = file_path
-                bar.update(1)
+
+        for save_future in as_completed(save_futures):
+            save_future.result()
+            bar.update(1)
 
     return committee_paths
 
 
+@lru_cache
+def get_lagrange_coefficients(indexes: Tuple[int, ...]) -> Tuple[int, ...]:
+    """
+    Calculates Lagrange coefficients at zero for the committee indexes.
+    The shares are evaluated at x = index + 1.
+    """
+    coefficients = []
+    for i in indexes:
+        numerator, denominator = 1, 1
+        for j in indexes:
+            if j != i:
+                numerator = numerator * (j + 1) % curve_order
+                denominator = denominator * (j - i) % curve_order
+        coefficients.append(
+            numerator * prime_field_inv(denominator, curve_order) % curve_order
+        )
+    return tuple(coefficients)
+
+
+@lru_cache(maxsize=PUBKEY_POINTS_CACHE_SIZE)
+def get_pubkey_point(public_key: BLSPubkey) -> Optimized_Point3D[FQ]:
+    """Decompresses BLS public key to the G1 point."""
+    return pubkey_to_G1(public_key)
+
+
+def multi_scalar_multiply(
+    points: Sequence[Optimized_Point3D[FQ]], scalars: Sequence[int]
+) -> Optimized_Point3D[FQ]:
+    """
+    Calculates sum of the points multiplied by the scalars.
+    Uses shared doublings for a few points and Pippenger's buckets method otherwise.
+    """
+    scalars = [scalar % curve_order for scalar in scalars]
+    bits_count = max(scalars, default=0).bit_length()
+    if len(points) < PIPPENGER_MIN_POINTS:
+        result = Z1
+        for bit in reversed(range(bits_count)):
+            result = double(result)
+            for point, scalar in zip(points, scalars):
+                if (scalar >> bit) & 1:
+                    result = add(result, point)
+        return result
+
+    window_size = max(int(math.log(len(points))), 2)
+    window_mask = (1 << window_size) - 1
+    result = Z1
+    for shift in reversed(range(0, bits_count, window_size)):
+        for _ in range(window_size):
+            result = double(result)
+
+        buckets = [Z1] * window_mask
+        for point, scalar in zip(points, scalars):
+            bucket_index = (scalar >> shift) & window_mask
+            if bucket_index:
+                buckets[bucket_index - 1] = add(buckets[bucket_index - 1], point)
+
+        # sum of bucket_index * bucket calculated with running sums
+        running_sum, window_sum = Z1, Z1
+        for bucket in reversed(buckets):
+            running_sum = add(running_sum, bucket)
+            window_sum = add(window_sum, running_sum)
+        result = add(result, window_sum)
+
+    return result
+
+
 def reconstruct_shared_bls_public_key(public_keys: Dict[int, BLSPubkey]) -> BLSPubkey:
     """
     Reconstructs shared BLS public key.
-    Copied from https://github.com/dankrad/python-ibft/blob/master/bls_threshold.py
+    Based on https://github.com/dankrad/python-ibft/blob/master/bls_threshold.py
     """
-    r = Z1
-    for i, key in public_keys.items():
-        key_point = pubkey_to_G1(key)
-        coef = 1
-        for j in public_keys:
-            if j != i:
-                coef = (
-                    -coef * (j + 1) * prime_field_inv(i - j, curve_order) % curve_order
-                )
-        r = add(r, multiply(key_point, coef))
-    return G1_to_pubkey(r)
+    coefficients = get_lagrange_coefficients(tuple(public_keys))
+    points = [get_pubkey_point(key) for key in public_keys.values()]
+    return G1_to_pubkey(multi_scalar_multiply(points, coefficients))
+
+
+def reconstruct_shared_bls_public_keys(
+    shards: Dict[int, List[BLSPubkey]]
+) -> Iterator[BLSPubkey]:
+    """
+    Reconstructs shared BLS public keys from the committee members' shards.
+    The Lagrange coefficients are calculated once for all the keys.
+    """
+    indexes = tuple(shards)
+    coefficients = get_lagrange_coefficients(indexes)
+    for public_keys in zip(*(shards[index] for index in indexes)):
+        points = [get_pubkey_point(key) for key in public_keys]
+        yield G1_to_pubkey(multi_scalar_multiply(points, coefficients))
+
+
+def _is_linear_combination_valid(
+    shards_points: List[List[Optimized_Point3D[FQ]]],
+    public_keys_points: List[Optimized_Point3D[FQ]],
+    coefficients: Sequence[int],
+    indexes: range,
+) -> bool:
+    """
+    Checks sum(l_j * sum(r_k * S_jk)) == sum(r_k * P_k) for the random weights r_k.
+    The sums are calculated per shard, so that the multi-scalar multiplications
+    use the short random weights instead of their products with the coefficients.
+    """
+    weights = [randbelow(RANDOM_WEIGHT_MAX) + 1 for _ in indexes]
+    result = neg(
+        multi_scalar_multiply([public_keys_points[k] for k in indexes], weights)
+    )
+    for shard_points, coefficient in zip(shards_points, coefficients):
+        shard_sum = multi_scalar_multiply([shard_points[k] for k in indexes], weights)
+        result = add(result, multiply(shard_sum, coefficient))
+
+    return is_inf(result)
+
+
+def _double_jacobian(x: int, y: int, z: int) -> Tuple[int, int, int]:
+    a = x * x % field_modulus
+    b = y * y % field_modulus
+    c = b * b % field_modulus
+    d = 2 * ((x + b) ** 2 - a - c) % field_modulus
+    e = 3 * a % field_modulus
+    x3 = (e * e - 2 * d) % field_modulus
+    return x3, (e * (d - x3) - 8 * c) % field_modulus, 2 * y * z % field_modulus
+
+
+def _add_affine_jacobian(
+    x1: int, y1: int, z1: int, x2: int, y2: int
+) -> Tuple[int, int, int]:
+    if z1 == 0:
+        return x2, y2, 1
+
+    z1z1 = z1 * z1 % field_modulus
+    h = (x2 * z1z1 - x1) % field_modulus
+    r = 2 * (y2 * z1 * z1z1 - y1) % field_modulus
+    if h == 0:
+        # the points are either equal or opposite
+        return _double_jacobian(x1, y1, z1) if r == 0 else (1, 1, 0)
+
+    hh = h * h % field_modulus
+    i = 4 * hh % field_modulus
+    j = h * i % field_modulus
+    v = x1 * i % field_modulus
+    x3 = (r * r - j - 2 * v) % field_modulus
+    y3 = (r * (v - x3) - 2 * y1 * j) % field_modulus
+    return x3, y3, ((z1 + h) ** 2 - z1z1 - hh) % field_modulus
+
+
+def _multiply_by_bls_x(x: int, y: int) -> Tuple[int, int, int]:
+    """Multiplies the affine point by BLS_X in the Jacobian coordinates."""
+    result = (x, y, 1)
+    for bit in bin(BLS_X)[3:]:
+        result = _double_jacobian(*result)
+        if bit == "1":
+            result = _add_affine_jacobian(*result, x, y)
+    return result
+
+
+def is_in_g1_subgroup(point: Optimized_Point3D[FQ]) -> bool:
+    """
+    Checks that the point of the curve is in the G1 subgroup with the endomorphism
+    test phi(P) == -x**2 * P, which multiplies by the 64-bit curve parameter twice
+    instead of multiplying by the 255-bit subgroup order.
+    The plain integers are used as the field elements to avoid the objects overhead.
+    """
+    if is_inf(point):
+        return True
+
+    affine_x, affine_y = normalize(point)
+    x, y = affine_x.n, affine_y.n
+    x1, y1, z1 = _multiply_by_bls_x(x, y)
+    if z1 == 0:
+        return False
+
+    z1_inv = pow(z1, -1, field_modulus)
+    z1_inv_squared = z1_inv * z1_inv % field_modulus
+    x2, y2, z2 = _multiply_by_bls_x(
+        x1 * z1_inv_squared % field_modulus,
+        y1 * z1_inv_squared * z1_inv % field_modulus,
+    )
+    if z2 == 0:
+        return False
+
+    # compare phi(P) with -(x**2 * P) without converting the latter to the affine
+    z2_squared = z2 * z2 % field_modulus
+    return (G1_ENDOMORPHISM_BETA * x * z2_squared - x2) % field_modulus == 0 and (
+        y * z2_squared * z2 + y2
+    ) % field_modulus == 0
+
+
+def get_subgroup_points(
+    public_keys: Sequence[BLSPubkey],
+) -> List[Optional[Optimized_Point3D[FQ]]]:
+    """
+    Decompresses BLS public keys to the G1 points.
+    Returns None for the points outside of the G1 subgroup.
+    """
+    points: List[Optional[Optimized_Point3D[FQ]]] = []
+    for public_key in public_keys:
+        point = pubkey_to_G1(public_key)
+        points.append(point if is_in_g1_subgroup(point) else None)
+    return points
+
+
+def verify_shared_bls_public_keys(
+    shards: Dict[int, List[BLSPubkey]], public_keys: List[BLSPubkey]
+) -> Optional[int]:
+    """
+    Verifies that the shards reconstruct the public keys using a random linear
+    combination of all the keys. The points are checked to be in the G1 subgroup first,
+    for which the check is probabilistic with 2**-128 error.
+    Returns index of the public key that failed the verification.
+    """
+    indexes = tuple(shards)
+    coefficients = get_lagrange_coefficients(indexes)
+    keys_lists = [shards[index] for index in indexes] + [public_keys]
+    chunk_size = max(math.ceil(len(public_keys) / WORKERS_COUNT), 1)
+    with click.progressbar(
+        length=len(public_keys) * len(keys_lists),
+        label="Decompressing public keys\t\t",
+        show_percent=False,
+        show_pos=True,
+    ) as bar, ProcessPoolExecutor(max_workers=WORKERS_COUNT) as executor:
+        futures = [
+            [
+                executor.submit(get_subgroup_points, list(chunk))
+                for chunk in chunkify(keys, chunk_size)
+            ]
+            for keys in keys_lists
+        ]
+        points_lists = []
+        for keys_futures in futures:
+            points: List[Optional[Optimized_Point3D[FQ]]] = []
+            for future in keys_futures:
+                chunk_points = future.result()
+                points.extend(chunk_points)
+                bar.update(len(chunk_points))
+            points_lists.append(points)
+
+    # the random linear combination might not detect the points outside of the subgroup
+    invalid_indexes = [
+        k for points in points_lists for k, point in enumerate(points) if point is None
+    ]
+    if invalid_indexes:
+        return min(invalid_indexes)
+
+    subgroup_points = cast(List[List[Optimized_Point3D[FQ]]], points_lists)
+    shards_points = subgroup_points[:-1]
+    public_keys_points = subgroup_points[-1]
+
+    keys_indexes = range(len(public_keys))
+    if _is_linear_combination_valid(
+        shards_points, public_keys_points, coefficients, keys_indexes
+    ):
+        return None
+
+    # bisect the keys to find the invalid one
+    while len(keys_indexes) > 1:
+        middle = len(keys_indexes) // 2
+        if _is_linear_combination_valid(
+            shards_points, public_keys_points, coefficients, keys_indexes[:middle]
+        ):
+            keys_indexes = keys_indexes[middle:]
+        else:
+            keys_indexes = keys_indexes[:middle]
+
+    return keys_indexes[0]
@@ -1,4 +1,5 @@
 from functools import cached_property
+from typing import Optional
 
 from Crypto.Cipher import AES
 from Crypto.Random import get_random_bytes
@@ -25,8 +26,13 @@ class Decoder:
 
 
 class Encoder:
+    def __init__(self, cipher_key: Optional[str] = None):
+        self.existing_cipher_key = cipher_key
+
     @cached_property
     def cipher_key(self) -> bytes:
+        if self.existing_cipher_key:
+            return str_to_bytes(self.existing_cipher_key)
         return get_random_bytes(CIPHER_KEY_LENGTH)
 
     @cached_property
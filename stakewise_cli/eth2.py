@@ -1,8 +1,11 @@
+import copy
+import json
 import os
 import secrets
 import string
+from dataclasses import field, make_dataclass
 from enum import Enum
-from typing import Dict, List, Set, Tuple
+from typing import Dict, List, Set, Tuple, Type
 
 import backoff
 import click
@@ -21,6 +24,12 @@ from staking_deposit.key_handling.key_derivation.tree import (
     derive_child_SK,
     derive_master_SK,
 )
+from staking_deposit.key_handling.keystore import (
+    Keystore,
+    KeystoreCrypto,
+    Pbkdf2Keystore,
+    ScryptKeystore,
+)
 from staking_deposit.utils.constants import MNEMONIC_LANG_OPTIONS
 from staking_deposit.utils.ssz import DepositData as SSZDepositData
 from staking_deposit.utils.ssz import (
@@ -58,6 +67,13 @@ SPECIAL_CHARS = "!@#$%^&*()_"
 PURPOSE = "12381"
 COIN_TYPE = "3600"
 
+# EIP-2335 keystore key derivation functions
+KDF_SCRYPT = "scrypt"
+KDF_PBKDF2 = "pbkdf2"
+KEYSTORE_KDFS = [KDF_SCRYPT, KDF_PBKDF2]
+# scrypt "n" parameter or pbkdf2 "c" parameter
+DEFAULT_KDF_COST = 2**18
+
 w3 = Web3()
 VALIDATOR_DEPOSIT_AMOUNT: Wei = w3.toWei(32, "ether")
 
@@ -114,6 +130,16 @@ def get_beacon_client(network: str) -> Beacon:
     return Beacon(base_url=url)
 
 
+def validate_kdf_cost(ctx, param, value):
+    if value < 1:
+        raise click.BadParameter("The KDF cost must be positive")
+    if ctx.params.get("keystore_kdf") == KDF_SCRYPT and (
+        value < 2 or value & (value - 1)
+    ):
+        raise click.BadParameter("The scrypt KDF cost must be a power of 2")
+    return value
+
+
 def validate_mnemonic(mnemonic) -> str:
     if verify_mnemonic(mnemonic, WORD_LISTS_PATH):
         return mnemonic
@@ -245,6 +271,41 @@ def generate_password() -> str:
             return "".join(password)
 
 
+def encrypt_keystore(
+    private_key: BLSPrivkey,
+    password: str,
+    path: str,
+    kdf: str = KDF_SCRYPT,
+    kdf_cost: int = DEFAULT_KDF_COST,
+) -> str:
+    """Encrypts the private key to the EIP-2335 keystore and returns it as JSON."""
+    base_class = ScryptKeystore if kdf == KDF_SCRYPT else Pbkdf2Keystore
+
+    # the keystore classes share the default crypto parameters,
+    # hence every keystore gets its own copy with the KDF cost
+    crypto = copy.deepcopy(base_class.crypto)
+    crypto.kdf.params["n" if kdf == KDF_SCRYPT else "c"] = kdf_cost
+    keystore_class: Type[Keystore] = make_dataclass(
+        base_class.__name__,
+        [("crypto", KeystoreCrypto, field(default_factory=lambda: crypto))],
+        bases=(base_class,),
+    )
+    secret = private_key.to_bytes(32, "big")
+    return keystore_class.encrypt(
+        secret=secret,
+        password=password,
+        path=path,
+        kdf_salt=os.urandom(32),
+        aes_iv=os.urandom(16),
+    ).as_json()
+
+
+def get_keystore_public_key(keystore: str, password: str) -> BLSPubkey:
+    """Decrypts the scrypt or pbkdf2 keystore and derives the public key of its private key."""
+    private_key = Keystore.from_json(json.loads(keystore)).decrypt(password)
+    return G2ProofOfPossession.SkToPk(int.from_bytes(private_key, byteorder="big"))
+
+
 def get_deposit_data_signature(
     private_key: BLSPrivkey,
     public_key: BLSPubkey,
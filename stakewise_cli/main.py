@@ -1,3 +1,4 @@
+import multiprocessing
 import warnings
 
 import click
@@ -51,4 +52,6 @@ cli.add_command(get_pubkey_index)
 cli.add_command(export_validator_keys)
 
 if __name__ == "__main__":
+    # required for the process pools in the frozen binary
+    multiprocessing.freeze_support()
     cli()
@@ -0,0 +1,161 @@
+import heapq
+from typing import Dict, Iterable, List, Optional, Tuple
+
+VALIDATOR_NAME_PREFIX = "validator"
+
+
+def get_validator_name_index(name: str) -> Optional[int]:
+    """Returns index of the generated validator name or None for the custom names."""
+    suffix = name[len(VALIDATOR_NAME_PREFIX) :]
+    if (
+        not name.startswith(VALIDATOR_NAME_PREFIX)
+        or not suffix.isdigit()
+        or str(int(suffix)) != suffix
+    ):
+        return None
+
+    return int(suffix)
+
+
+class ValidatorNamesIndex(object):
+    """Allocates the lowest validator names that are not in use."""
+
+    def __init__(self, names: Iterable[str]):
+        used_indexes = set()
+        for name in names:
+            index = get_validator_name_index(name)
+            if index is not None:
+                used_indexes.add(index)
+
+        self.next_index = max(used_indexes) + 1 if used_indexes else 0
+        # the list is sorted, hence it's already a valid heap
+        self.free_indexes = [
+            index for index in range(self.next_index) if index not in used_indexes
+        ]
+
+    def allocate(self) -> str:
+        """Returns the next free validator name."""
+        if self.free_indexes:
+            index = heapq.heappop(self.free_indexes)
+        else:
+            index = self.next_index
+            self.next_index += 1
+
+        return f"{VALIDATOR_NAME_PREFIX}{index}"
+
+
+class ValidatorsScheduler(object):
+    """
+    Places validator keys to the least loaded validators using the min-heap.
+    Validators that have holes left by the exited keys are filled first,
+    so that fewer validators keystores must be updated.
+    """
+
+    def __init__(
+        self,
+        keys_counts: Dict[str, int],
+        capacity: int,
+        holes: Optional[Dict[str, int]] = None,
+    ):
+        self.capacity = capacity
+        self.keys_counts = dict(keys_counts)
+        self.holes = dict(holes or {})
+        self.names_index = ValidatorNamesIndex(self.keys_counts.keys())
+        self.heap: List[Tuple[bool, int, Tuple[int, str]]] = []
+        self._rebuild_heap()
+
+    @staticmethod
+    def _get_name_order(name: str) -> Tuple[int, str]:
+        index = get_validator_name_index(name)
+        return -1 if index is None else index, name
+
+    def _get_heap_entry(self, name: str) -> Tuple[bool, int, Tuple[int, str]]:
+        return (
+            not self.holes.get(name),
+            self.keys_counts[name],
+            self._get_name_order(name),
+        )
+
+    def _rebuild_heap(self) -> None:
+        self.heap = [
+            self._get_heap_entry(name)
+            for name, count in self.keys_counts.items()
+            if count < self.capacity
+        ]
+        heapq.heapify(self.heap)
+
+    @property
+    def available_slots(self) -> int:
+        """Returns the number of keys that can be placed without new validators."""
+        return sum(max(self.capacity - count, 0) for count in self.keys_counts.values())
+
+    def add_validator(self) -> str:
+        """Allocates new empty validator."""
+        name = self.names_index.allocate()
+        self.keys_counts[name] = 0
+        heapq.heappush(self.heap, self._get_heap_entry(name))
+        return name
+
+    def reserve(self, keys_count: int) -> None:
+        """Allocates new validators if there is not enough capacity for the keys."""
+        available_slots = self.available_slots
+        while available_slots < keys_count:
+            self.add_validator()
+            available_slots += self.capacity
+
+    def place(self) -> str:
+        """Returns the name of the validator the next key must be placed to."""
+        if not self.heap:
+            self.add_validator()
+
+        name = heapq.heappop(self.heap)[-1][1]
+        self.keys_counts[name] += 1
+        if self.holes.get(name):
+            self.holes[name] -= 1
+
+        if self.keys_counts[name] < self.capacity:
+            heapq.heappush(self.heap, self._get_heap_entry(name))
+
+        return name
+
+    def rebalance(self) -> List[Tuple[str, str]]:
+        """
+        Distributes keys evenly across the validators.
+        Returns the minimal list of key moves as (from validator, to validator) pairs.
+        """
+        if not self.keys_counts:
+            return []
+
+        # the most loaded validators keep the remainder to minimize the movements
+        names = sorted(
+            self.keys_counts,
+            key=lambda name: (-self.keys_counts[name], self._get_name_order(name)),
+        )
+        base, extra = divmod(sum(self.keys_counts.values()), len(names))
+        donors: List[Tuple[str, int]] = []
+        receivers: List[Tuple[str, int]] = []
+        for i, name in enumerate(names):
+            diff = self.keys_counts[name] - base - (1 if i < extra else 0)
+            if diff > 0:
+                donors.append((name, diff))
+            elif diff < 0:
+                receivers.append((name, -diff))
+
+        moves: List[Tuple[str, str]] = []
+        receivers.reverse()
+        for from_name, surplus in donors:
+            while surplus:
+                to_name, deficit = receivers.pop()
+                moved = min(surplus, deficit)
+                moves.extend([(from_name, to_name)] * moved)
+                surplus -= moved
+                if deficit > moved:
+                    receivers.append((to_name, deficit - moved))
+
+        for from_name, to_name in moves:
+            self.keys_counts[from_name] -= 1
+            self.keys_counts[to_name] += 1
+
+        self.holes = {}
+        self._rebuild_heap()
+        return moves
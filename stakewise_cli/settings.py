@@ -1,3 +1,5 @@
+import os
+
 from decouple import Csv, config
 
 # extra pins to pinata for redundancy
@@ -30,5 +32,19 @@ IPFS_EXTRA_FETCH_ENDPOINTS = config(
 VAULT_VALIDATORS_MOUNT_POINT = config(
     "VAULT_VALIDATORS_MOUNT_POINT", default="validators"
 )
+VAULT_CONCURRENCY = config("VAULT_CONCURRENCY", default=10, cast=int)
+VAULT_RATE_LIMIT = config("VAULT_RATE_LIMIT", default=50, cast=float)
+
+# stores hashes of the vault keystores that were already verified, one file per vault
+VERIFIED_KEYSTORES_LEDGER_DIR = config(
+    "VERIFIED_KEYSTORES_LEDGER_DIR",
+    default=os.path.join(os.path.expanduser("~"), ".stakewise", "verified_keystores"),
+)
 
 IS_LEGACY = config("IS_LEGACY", default=False, cast=bool)
+
+# maximum number of the database connections kept by the command
+DATABASE_POOL_SIZE = config("DATABASE_POOL_SIZE", default=1, cast=int)
+
+# number of workers used for the CPU-bound tasks
+WORKERS_COUNT = config("WORKERS_COUNT", default=os.cpu_count() or 1, cast=int)
@@ -0,0 +1,164 @@
+import struct
+from functools import lru_cache
+from typing import BinaryIO, Iterable, Iterator, List, cast
+
+import click
+from Crypto.Cipher import AES, PKCS1_OAEP
+from Crypto.Cipher._mode_eax import EaxMode
+from Crypto.Cipher.PKCS1_OAEP import PKCS1OAEP_Cipher
+from Crypto.PublicKey import RSA
+from Crypto.Random import get_random_bytes
+
+from stakewise_cli.typings import BLSPrivkey
+
+# Binary shard file layout (version 1):
+#   header: magic (8 bytes) | version (1 byte)
+#   RSA OAEP encrypted AES session key
+#   chunks: last flag (1 byte) | length (4 bytes) | ciphertext | tag (16 bytes)
+# Every chunk holds up to SHARD_CHUNK_SIZE 32-byte big-endian scalars and is
+# encrypted with AES EAX. The nonce is derived from the chunk number and the last
+# flag, so reordered, truncated or extended files fail to decrypt.
+SHARD_MAGIC = b"SWSHARD\x00"
+SHARD_VERSION = 1
+SHARD_HEADER = SHARD_MAGIC + bytes([SHARD_VERSION])
+SHARD_CHUNK_SIZE = 1024
+SHARD_SCALAR_LENGTH = 32
+SHARD_TAG_LENGTH = 16
+SHARD_CHUNK_HEADER = struct.Struct(">BI")
+
+
+@lru_cache
+def get_rsa_cipher(recipient_public_key: str) -> PKCS1OAEP_Cipher:
+    """Parses committee member's RSA public key and creates the cipher."""
+    public_key = RSA.import_key(recipient_public_key)
+    return PKCS1_OAEP.new(public_key)
+
+
+def _get_chunk_cipher(session_key: bytes, chunk_index: int, is_last: bool) -> EaxMode:
+    nonce = chunk_index.to_bytes(15, "big") + bytes([is_last])
+    cipher = cast(EaxMode, AES.new(session_key, AES.MODE_EAX, nonce=nonce))
+    cipher.update(SHARD_HEADER)
+    return cipher
+
+
+def _write_chunk(
+    f: BinaryIO,
+    session_key: bytes,
+    chunk_index: int,
+    shares: List[BLSPrivkey],
+    is_last: bool,
+) -> None:
+    data = b"".join(share.to_bytes(SHARD_SCALAR_LENGTH, "big") for share in shares)
+    cipher = _get_chunk_cipher(session_key, chunk_index, is_last)
+    ciphertext, tag = cipher.encrypt_and_digest(data)
+    f.write(SHARD_CHUNK_HEADER.pack(is_last, len(ciphertext)))
+    f.write(ciphertext)
+    f.write(tag)
+
+
+def write_shard_file(
+    file_path: str, recipient_public_key: str, shares: Iterable[BLSPrivkey]
+) -> None:
+    """Encrypts shares with the recipient RSA public key and streams them to the file."""
+    session_key = get_random_bytes(32)
+    enc_session_key = get_rsa_cipher(recipient_public_key).encrypt(session_key)
+    with open(file_path, "wb") as f:
+        f.write(SHARD_HEADER)
+        f.write(enc_session_key)
+
+        chunk_index = 0
+        chunk: List[BLSPrivkey] = []
+        for share in shares:
+            if len(chunk) == SHARD_CHUNK_SIZE:
+                _write_chunk(f, session_key, chunk_index, chunk, is_last=False)
+                chunk_index += 1
+                chunk = []
+            chunk.append(share)
+
+        _write_chunk(f, session_key, chunk_index, chunk, is_last=True)
+
+
+def _decrypt_session_key(rsa_key: RSA.RsaKey, enc_session_key: bytes) -> bytes:
+    try:
+        return PKCS1_OAEP.new(rsa_key).decrypt(enc_session_key)
+    except:  # noqa: E722
+        raise click.ClickException(
+            "Failed to decrypt the session key. Please check whether the paths to private key and shard"
+        )
+
+
+def _read_legacy_shard(f: BinaryIO, rsa_key: RSA.RsaKey) -> Iterator[BLSPrivkey]:
+    enc_session_key, nonce, tag, ciphertext = [
+        f.read(x) for x in (rsa_key.size_in_bytes(), 16, 16, -1)
+    ]
+    session_key = _decrypt_session_key(rsa_key, enc_session_key)
+
+    # Decrypt the data with the AES session key
+    cipher_aes = cast(EaxMode, AES.new(session_key, AES.MODE_EAX, nonce))
+    try:
+        private_keys = cipher_aes.decrypt_and_verify(ciphertext, tag).split(b",")
+    except:  # noqa: E722
+        raise click.ClickException("Failed to decrypt the shard file. Is it corrupted?")
+
+    for private_key in private_keys:
+        yield BLSPrivkey(int(private_key))
+
+
+def _read_chunks(f: BinaryIO, session_key: bytes) -> Iterator[BLSPrivkey]:
+    chunk_index = 0
+    while True:
+        chunk_header = f.read(SHARD_CHUNK_HEADER.size)
+        if len(chunk_header) != SHARD_CHUNK_HEADER.size:
+            raise click.ClickException("The shard file is truncated. Is it corrupted?")
+
+        is_last, length = SHARD_CHUNK_HEADER.unpack(chunk_header)
+        ciphertext = f.read(length)
+        tag = f.read(SHARD_TAG_LENGTH)
+        cipher = _get_chunk_cipher(session_key, chunk_index, bool(is_last))
+        try:
+            data = cipher.decrypt_and_verify(ciphertext, tag)
+        except:  # noqa: E722
+            raise click.ClickException(
+                "Failed to decrypt the shard file. Is it corrupted?"
+            )
+
+        for i in range(0, len(data), SHARD_SCALAR_LENGTH):
+            yield BLSPrivkey(
+                int.from_bytes(data[i : i + SHARD_SCALAR_LENGTH], byteorder="big")
+            )
+
+        if is_last:
+            break
+        chunk_index += 1
+
+    if f.read(1):
+        raise click.ClickException(
+            "Unexpected data at the end of the shard file. Is it corrupted?"
+        )
+
+
+def read_shard_file(file_path: str, rsa_key: RSA.RsaKey) -> Iterator[BLSPrivkey]:
+    """
+    Decrypts shares from the shard file with the committee member RSA private key.
+    Supports both binary and legacy comma-separated shard files.
+    """
+    try:
+        f = open(file_path, "rb")
+    except:  # noqa: E722
+        raise click.ClickException("Invalid operator shard file")
+
+    with f:
+        if f.read(len(SHARD_MAGIC)) != SHARD_MAGIC:
+            f.seek(0)
+            yield from _read_legacy_shard(f, rsa_key)
+            return
+
+        version = f.read(1)
+        if version != bytes([SHARD_VERSION]):
+            raise click.ClickException(
+                f"Unsupported operator shard file version: {version.hex()}"
+            )
+
+        enc_session_key = f.read(rsa_key.size_in_bytes())
+        session_key = _decrypt_session_key(rsa_key, enc_session_key)
+        yield from _read_chunks(f, session_key)
@@ -1,91 +1,711 @@
-from typing import List
+import io
+import re
+import select
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import (
+    Callable,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
 from urllib.parse import urlparse
 
+import backoff
 import click
 import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from psycopg2.extensions import connection as Connection
 from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 
+from stakewise_cli.settings import DATABASE_POOL_SIZE
 from stakewise_cli.typings import DatabaseKeyRecord
+from stakewise_cli.utils import get_digest
+
+T = TypeVar("T")
+
+KEYS_COLUMNS = ("public_key", "private_key", "nonce", "validator_index")
+FETCH_KEYS_BATCH_SIZE = 1000
+# validator index of the keys_digests row with the digest of all the keys
+GLOBAL_DIGEST_INDEX = -1
+
+# sync-db notifies the channel with the updated validator indexes
+KEYS_UPDATES_CHANNEL = "keys_updates"
+NOTIFY_ALL_PAYLOAD = "*"
+MAX_NOTIFY_PAYLOAD_LENGTH = 7999
+LISTEN_TIMEOUT = 60
+LISTEN_RECONNECT_MAX_DELAY = 60
+# the pooled connections idle for longer are checked before being reused
+POOL_PING_IDLE_TIME = 30
+DB_CONNECTION_ERROR = (
+    "Error: failed to connect to the database server with provided URL."
+    " Error details: {}"
+)
+# the select expressions of the keys columns valid for both the current keys table
+# and the one of the previous versions, which stores the text columns,
+# so that the readers can be upgraded before sync-db migrates the table
+PUBLIC_KEY_EXPRESSION = "'0x' || substr(public_key::text, 3)"
+VALIDATOR_INDEX_EXPRESSION = "validator_index::integer"
+# the bytea::text cast depends on the output format
+SET_BYTEA_OUTPUT_QUERY = "SET LOCAL bytea_output = 'hex'"
+# text COPY format special characters
+COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+COPY_SPECIAL_CHARS = re.compile(r"[\\\t\n\r]")
+
+
+class IteratorBuffer(io.TextIOBase):
+    """Read-only text file that streams the lines from the iterator."""
+
+    def __init__(self, lines: Iterator[str]):
+        self.lines = lines
+        self.pending = ""
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: Optional[int] = -1) -> str:
+        parts = [self.pending]
+        length = len(self.pending)
+        while size is None or size < 0 or length < size:
+            try:
+                line = next(self.lines)
+            except StopIteration:
+                break
+            parts.append(line)
+            length += len(line)
+
+        data = "".join(parts)
+        if size is None or size < 0:
+            size = len(data)
+        self.pending = data[size:]
+        return data[:size]
+
+
+def escape_copy_value(value: str) -> str:
+    """Escapes the text COPY format special characters of the value."""
+    # the hex and base64 encoded keys have no special characters, skip translating
+    if COPY_SPECIAL_CHARS.search(value) is None:
+        return value
+    return value.translate(COPY_ESCAPES)
+
+
+def get_copy_lines(keys: Iterable[DatabaseKeyRecord]) -> Iterator[str]:
+    """Formats the key records as the text COPY format lines of the keys table."""
+    for key in keys:
+        # bytea hex format, the backslash is escaped
+        public_key = "\\\\x" + escape_copy_value(key["public_key"][2:])
+        private_key = escape_copy_value(key["private_key"])
+        nonce = escape_copy_value(key["nonce"])
+        yield f"{public_key}\t{private_key}\t{nonce}\t{int(key['validator_index'])}\n"
+
+
+def get_keys_digests(keys: Iterable[DatabaseKeyRecord]) -> Dict[int, str]:
+    """
+    Returns the digests of the public keys per validator index
+    and the digest of all the keys placements.
+    The private keys are identified by the public keys, as their ciphertexts
+    change whenever the keys are re-encrypted.
+    """
+    public_keys: Dict[int, List[str]] = {}
+    records: List[str] = []
+    for key in keys:
+        validator_index = int(key["validator_index"])
+        public_keys.setdefault(validator_index, []).append(key["public_key"])
+        records.append(f"{key['public_key']},{validator_index}")
+
+    digests = {
+        validator_index: get_digest(*sorted(index_public_keys))
+        for validator_index, index_public_keys in public_keys.items()
+    }
+    digests[GLOBAL_DIGEST_INDEX] = get_digest(*sorted(records))
+    return digests
+
+
+def get_validator_indexes_condition(
+    validator_indexes: Optional[Sequence[int]] = None,
+    shard: Optional[Tuple[int, int]] = None,
+) -> Tuple[str, List]:
+    """Returns the SQL condition and its parameters that select the validator indexes."""
+    conditions: List[str] = []
+    params: List = []
+    if validator_indexes is not None:
+        conditions.append(f"{VALIDATOR_INDEX_EXPRESSION} = ANY(%s)")
+        params.append(list(validator_indexes))
+    if shard is not None:
+        conditions.append(f"mod({VALIDATOR_INDEX_EXPRESSION}, %s) = %s")
+        params.extend((shard[1], shard[0]))
+
+    return " AND ".join(conditions) or "TRUE", params
+
+
+def is_validator_index_selected(
+    validator_index: int,
+    validator_indexes: Optional[Sequence[int]] = None,
+    shard: Optional[Tuple[int, int]] = None,
+) -> bool:
+    """Checks whether the validator index matches the validator indexes and the shard."""
+    if validator_index == GLOBAL_DIGEST_INDEX:
+        return False
+    if validator_indexes is not None and validator_index not in validator_indexes:
+        return False
+    if shard is not None and validator_index % shard[1] != shard[0]:
+        return False
+    return True
+
+
+class DatabaseConnectionError(click.ClickException):
+    """Raised when the primary database is not reachable."""
+
+
+# the errors of the lost connections, which are retried while watching the keys updates
+CONNECTION_ERRORS = (
+    psycopg2.OperationalError,
+    psycopg2.InterfaceError,
+    DatabaseConnectionError,
+)
+
+
+def _log_sync_retry(details: Dict) -> None:
+    # the handler is called while the error is handled
+    error = sys.exc_info()[1]
+    click.secho(
+        f"Failed to sync the keys, retrying in {details['wait']:.1f}s: {error}",
+        bold=True,
+        fg="red",
+    )
+
+
+def retry_on_connection_errors(func: Callable[..., T]) -> Callable[..., T]:
+    """Retries the function with the increasing delays until the database is reachable."""
+    return backoff.on_exception(
+        backoff.expo,
+        CONNECTION_ERRORS,
+        max_value=LISTEN_RECONNECT_MAX_DELAY,
+        on_backoff=_log_sync_retry,
+    )(func)
 
 
 class Database:
-    def __init__(self, db_url: str):
+    """
+    Keeps the pools of connections that are reused across the calls.
+    Every read is routed to the first available read database, if any,
+    and falls back to the primary one. The writes always go to the primary database.
+    The fallback happens only when the connection is taken: the query that fails
+    on the read database raises the error, as the streamed rows cannot be re-read,
+    and the next read is routed to the next available database.
+    The reads nested into the transaction of the thread, e.g. while the keys are streamed,
+    run in its connection, so that a single pooled connection is enough.
+    The connections are closed on exit from the context manager or with the close call.
+    """
+
+    def __init__(
+        self,
+        db_url: str,
+        read_db_urls: Sequence[str] = (),
+        pool_size: int = DATABASE_POOL_SIZE,
+    ):
         self.db_url = db_url
+        self.read_db_urls = list(read_db_urls)
+        self.pool_size = pool_size
+        self._pools: Dict[str, ThreadedConnectionPool] = {}
+        # the times the pooled connections were returned at
+        self._released_at: Dict[Connection, float] = {}
+        self._local = threading.local()
+
+    def __enter__(self) -> "Database":
+        return self
 
-    def update_keys(self, keys: List[DatabaseKeyRecord]) -> None:
-        """Updates database records to new state."""
-        with _get_db_connection(self.db_url) as conn:
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _get_pool(self, db_url: str) -> ThreadedConnectionPool:
+        pool = self._pools.get(db_url)
+        if pool is None:
+            pool = ThreadedConnectionPool(
+                minconn=1,
+                maxconn=self.pool_size,
+                **_get_db_connection_params(db_url),
+            )
+            self._pools[db_url] = pool
+
+        return pool
+
+    def _close_pool(self, db_url: str) -> None:
+        pool = self._pools.pop(db_url, None)
+        if pool is not None:
+            pool.closeall()
+            self._released_at = {
+                conn: released_at
+                for conn, released_at in self._released_at.items()
+                if not conn.closed
+            }
+
+    def _get_connection(self, db_url: str) -> Tuple[ThreadedConnectionPool, Connection]:
+        """
+        Takes the connection from the pool, the pool is reconnected if the server has failed.
+        Only the connections idle for a while are checked, the failures of the rest
+        are raised by their queries.
+        """
+        pool = self._get_pool(db_url)
+        conn = pool.getconn()
+        released_at = self._released_at.pop(conn, None)
+        if released_at is None or time.monotonic() - released_at < POOL_PING_IDLE_TIME:
+            return pool, conn
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return pool, conn
+        except psycopg2.Error:
+            pool.putconn(conn, close=True)
+
+        # the rest of the pool connections are also broken
+        self._close_pool(db_url)
+        pool = self._get_pool(db_url)
+        return pool, pool.getconn()
+
+    def _get_primary_connection(self) -> Tuple[ThreadedConnectionPool, Connection]:
+        try:
+            return self._get_connection(self.db_url)
+        except psycopg2.OperationalError as e:
+            raise DatabaseConnectionError(DB_CONNECTION_ERROR.format(e))
+
+    def _get_read_connection(self) -> Tuple[ThreadedConnectionPool, Connection]:
+        for db_url in self.read_db_urls:
+            try:
+                return self._get_connection(db_url)
+            except psycopg2.OperationalError as e:
+                click.secho(
+                    f"Failed to connect to the read database {urlparse(db_url).hostname}: {e}",
+                    fg="red",
+                )
+
+        return self._get_primary_connection()
+
+    def _release_connection(
+        self, pool: ThreadedConnectionPool, conn: Connection
+    ) -> None:
+        if pool.closed:
+            # the pool was reconnected while the connection was taken
+            conn.close()
+            return
+
+        # the connections closed by the failures are discarded by the pool
+        pool.putconn(conn)
+        if not conn.closed:
+            self._released_at[conn] = time.monotonic()
+
+    @contextmanager
+    def connection(self, read_only: bool = False) -> Iterator[Connection]:
+        """
+        Takes the connection from the pool and runs the transaction in it.
+        The reads nested into the transaction of the thread run in its connection,
+        as well as the writes nested into the write transaction.
+        """
+        current = getattr(self._local, "connection", None)
+        if current is not None and (read_only or not current[1]):
+            yield current[0]
+            return
+
+        if read_only:
+            pool, conn = self._get_read_connection()
+        else:
+            pool, conn = self._get_primary_connection()
+
+        self._local.connection = (conn, read_only)
+        try:
+            with conn:
+                yield conn
+        finally:
+            self._local.connection = current
+            self._release_connection(pool, conn)
+
+    def close(self) -> None:
+        """Closes all the pools connections."""
+        for pool in self._pools.values():
+            pool.closeall()
+        self._pools = {}
+        self._released_at = {}
+
+    def update_keys(
+        self, keys: List[DatabaseKeyRecord], reencrypt: bool = True
+    ) -> None:
+        """
+        Updates database records to new state.
+        The new records are loaded into the temporary table and only the changed rows
+        of the keys table are updated in a single transaction, so the readers never see
+        an empty or a missing table.
+        Unless the keys are re-encrypted, the existing keys keep their ciphertexts.
+        """
+        with self.connection() as conn:
             with conn.cursor() as cur:
-                # recreate table
                 cur.execute(
                     """
-                    DROP TABLE IF EXISTS keys;
-                    CREATE TABLE keys (
-                        public_key TEXT UNIQUE NOT NULL,
+                    CREATE TABLE IF NOT EXISTS keys (
+                        public_key BYTEA UNIQUE NOT NULL,
                         private_key TEXT UNIQUE NOT NULL,
                         nonce TEXT NOT NULL,
-                        validator_index TEXT NOT NULL)
+                        validator_index INTEGER NOT NULL)
                     ;"""
                 )
+                _migrate_keys_table(cur)
+                cur.execute(
+                    """
+                    CREATE INDEX IF NOT EXISTS keys_validator_index_idx
+                    ON keys (validator_index);
+                    CREATE TEMPORARY TABLE new_keys (LIKE keys) ON COMMIT DROP;
+                    """
+                )
+
+                # stream new keys
+                cur.copy_expert(
+                    f"COPY new_keys ({', '.join(KEYS_COLUMNS)}) FROM STDIN",
+                    IteratorBuffer(get_copy_lines(keys)),
+                )
 
-                # insert keys
-                execute_values(
+                # apply changes
+                if reencrypt:
+                    columns: Tuple[str, ...] = (
+                        "private_key",
+                        "nonce",
+                        "validator_index",
+                    )
+                else:
+                    columns = ("validator_index",)
+                updates = ", ".join(
+                    f"{column} = new_keys.{column}" for column in columns
+                )
+                current_values = ", ".join(f"keys.{column}" for column in columns)
+                new_values = ", ".join(f"new_keys.{column}" for column in columns)
+                cur.execute(
+                    f"""
+                    DELETE FROM keys
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM new_keys WHERE new_keys.public_key = keys.public_key
+                    );
+                    UPDATE keys SET {updates}
+                    FROM new_keys
+                    WHERE keys.public_key = new_keys.public_key
+                    AND ROW({current_values}) IS DISTINCT FROM ROW({new_values});
+                    INSERT INTO keys (public_key, private_key, nonce, validator_index)
+                    SELECT public_key, private_key, nonce, validator_index FROM new_keys
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM keys WHERE keys.public_key = new_keys.public_key
+                    );
+                    """
+                )
+
+                # update digests of the changed validator indexes
+                digests = get_keys_digests(keys)
+                cur.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS keys_digests (
+                        validator_index INTEGER PRIMARY KEY,
+                        digest TEXT NOT NULL)
+                    ;"""
+                )
+                cur.execute(
+                    """
+                    DELETE FROM keys_digests WHERE validator_index <> ALL(%s)
+                    RETURNING validator_index
+                    """,
+                    (list(digests.keys()),),
+                )
+                updated_indexes = set(row[0] for row in cur.fetchall())
+                rows = execute_values(
                     cur,
-                    "INSERT INTO keys (public_key, private_key, nonce, validator_index) VALUES %s",
-                    [
-                        (
-                            x["public_key"],
-                            x["private_key"],
-                            x["nonce"],
-                            x["validator_index"],
-                        )
-                        for x in keys
-                    ],
+                    """
+                    INSERT INTO keys_digests (validator_index, digest) VALUES %s
+                    ON CONFLICT (validator_index) DO UPDATE SET digest = EXCLUDED.digest
+                    WHERE keys_digests.digest <> EXCLUDED.digest
+                    RETURNING validator_index
+                    """,
+                    list(digests.items()),
+                    fetch=True,
+                )
+                updated_indexes.update(row[0] for row in rows)
+
+                # the listeners are notified once the transaction is committed
+                if updated_indexes:
+                    payload = ",".join(str(i) for i in sorted(updated_indexes))
+                    if len(payload) > MAX_NOTIFY_PAYLOAD_LENGTH:
+                        payload = NOTIFY_ALL_PAYLOAD
+                    cur.execute(
+                        "SELECT pg_notify(%s, %s)", (KEYS_UPDATES_CHANNEL, payload)
+                    )
+
+    def listen_keys_updates(self) -> Generator[Optional[Set[int]], None, None]:
+        """
+        Subscribes to the keys updates and yields the updated validator indexes.
+        None is yielded after every (re)subscription and when all the indexes must be synced,
+        so that the updates committed while not subscribed are not missed.
+        The notifications are not replicated, hence the primary database is listened to.
+        """
+        while True:
+            conn = _get_listen_connection(self.db_url)
+            try:
+                yield None
+
+                while True:
+                    if select.select([conn], [], [], LISTEN_TIMEOUT) == ([], [], []):
+                        # detect the connections dropped without notice
+                        with conn.cursor() as cur:
+                            cur.execute("SELECT 1")
+
+                        # read databases might have lagged behind the notification
+                        if self.read_db_urls:
+                            yield None
+                        continue
+
+                    conn.poll()
+                    updated_indexes: Optional[Set[int]] = set()
+                    while conn.notifies:
+                        payload = conn.notifies.pop(0).payload
+                        if payload == NOTIFY_ALL_PAYLOAD:
+                            updated_indexes = None
+                        elif updated_indexes is not None:
+                            updated_indexes.update(int(i) for i in payload.split(","))
+
+                    if updated_indexes != set():
+                        yield updated_indexes
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                click.secho(
+                    f"Lost the database connection, reconnecting: {e}",
+                    bold=True,
+                    fg="red",
+                )
+            finally:
+                conn.close()
+
+    def is_keys_table_migrated(self) -> bool:
+        """Checks whether the keys table is missing or has the columns of the current version."""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                columns_types = _get_keys_columns_types(cur)
+                return "text" not in (
+                    columns_types.get("public_key"),
+                    columns_types.get("validator_index"),
+                )
+
+    def fetch_first_key(self) -> Optional[DatabaseKeyRecord]:
+        """Returns any of the keys or None if there are no keys yet."""
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT to_regclass('keys')")
+                if cur.fetchone()[0] is None:
+                    return None
+
+                cur.execute(SET_BYTEA_OUTPUT_QUERY)
+                cur.execute(
+                    f"""
+                    SELECT {PUBLIC_KEY_EXPRESSION}, private_key, nonce, {VALIDATOR_INDEX_EXPRESSION}
+                    FROM keys LIMIT 1
+                    """
+                )
+                row = cur.fetchone()
+                if row is None:
+                    return None
+
+                return DatabaseKeyRecord(
+                    public_key=row[0],
+                    private_key=row[1],
+                    nonce=row[2],
+                    validator_index=row[3],
+                )
+
+    def fetch_keys_digest(
+        self, validator_index: int = GLOBAL_DIGEST_INDEX
+    ) -> Optional[str]:
+        """
+        Returns the digest of the validator index public keys or of all the keys.
+        Returns None if the digests are not maintained yet.
+        """
+        with self.connection(read_only=True) as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT to_regclass('keys_digests')")
+                if cur.fetchone()[0] is None:
+                    return None
+
+                cur.execute(
+                    "SELECT digest FROM keys_digests WHERE validator_index = %s",
+                    (validator_index,),
+                )
+                row = cur.fetchone()
+                return row[0] if row else None
+
+    def fetch_selected_keys_digest(
+        self,
+        validator_indexes: Optional[Sequence[int]] = None,
+        shard: Optional[Tuple[int, int]] = None,
+    ) -> Optional[str]:
+        """
+        Returns the digest of the public keys of the selected validator indexes.
+        Returns None if the digests are not maintained yet.
+        """
+        condition, params = get_validator_indexes_condition(validator_indexes, shard)
+        with self.connection(read_only=True) as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT to_regclass('keys_digests')")
+                if cur.fetchone()[0] is None:
+                    return None
+
+                cur.execute(
+                    f"""
+                    SELECT validator_index, digest FROM keys_digests
+                    WHERE validator_index <> %s AND {condition}
+                    ORDER BY validator_index
+                    """,
+                    [GLOBAL_DIGEST_INDEX, *params],
                 )
+                return get_digest(*(f"{row[0]},{row[1]}" for row in cur.fetchall()))
 
     def fetch_public_keys_by_validator_index(self, validator_index: int) -> List[str]:
-        with _get_db_connection(self.db_url) as conn:
+        with self.connection(read_only=True) as conn:
             with conn.cursor() as cur:
+                cur.execute(SET_BYTEA_OUTPUT_QUERY)
                 cur.execute(
-                    "select public_key from keys where validator_index= %s",
+                    f"""
+                    SELECT {PUBLIC_KEY_EXPRESSION} FROM keys
+                    WHERE {VALIDATOR_INDEX_EXPRESSION} = %s
+                    """,
                     (validator_index,),
                 )
                 rows = cur.fetchall()
                 return [row[0] for row in rows]
 
-    def fetch_keys(self) -> List[DatabaseKeyRecord]:
-        with _get_db_connection(self.db_url) as conn:
+    def fetch_keys(
+        self,
+        validator_indexes: Optional[Sequence[int]] = None,
+        shard: Optional[Tuple[int, int]] = None,
+    ) -> Iterator[DatabaseKeyRecord]:
+        """
+        Streams the keys of the selected validator indexes in batches
+        using the server-side cursor.
+        """
+        condition, params = get_validator_indexes_condition(validator_indexes, shard)
+        with self.connection(read_only=True) as conn:
             with conn.cursor() as cur:
-                cur.execute("select * from keys")
-                rows = cur.fetchall()
-                return [
-                    DatabaseKeyRecord(
+                cur.execute(SET_BYTEA_OUTPUT_QUERY)
+
+            with conn.cursor(name="fetch_keys") as cur:
+                cur.itersize = FETCH_KEYS_BATCH_SIZE
+                cur.execute(
+                    f"""
+                    SELECT {PUBLIC_KEY_EXPRESSION}, private_key, nonce, {VALIDATOR_INDEX_EXPRESSION}
+                    FROM keys WHERE {condition}
+                    """,
+                    params,
+                )
+                for row in cur:
+                    yield DatabaseKeyRecord(
                         public_key=row[0],
                         private_key=row[1],
                         nonce=row[2],
                         validator_index=row[3],
                     )
-                    for row in rows
-                ]
+
+
+def _get_keys_columns_types(cur) -> Dict[str, str]:
+    cur.execute(
+        """
+        SELECT column_name, data_type FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'keys'
+        """
+    )
+    return dict(cur.fetchall())
+
+
+def _migrate_keys_table(cur) -> None:
+    """Converts the text columns of the keys table created by the previous versions."""
+    columns_types = _get_keys_columns_types(cur)
+    if columns_types.get("public_key") == "text":
+        cur.execute(
+            """
+            ALTER TABLE keys ALTER COLUMN public_key TYPE BYTEA
+            USING decode(substr(public_key, 3), 'hex')
+            """
+        )
+    if columns_types.get("validator_index") == "text":
+        cur.execute(
+            """
+            ALTER TABLE keys ALTER COLUMN validator_index TYPE INTEGER
+            USING validator_index::integer
+            """
+        )
 
 
 def check_db_connection(db_url):
-    connection = _get_db_connection(db_url=db_url)
     try:
-        cur = connection.cursor()
-        cur.execute("SELECT 1")
+        _check_db_connection(db_url)
     except psycopg2.OperationalError as e:
-        raise click.ClickException(
-            f"Error: failed to connect to the database server with provided URL. Error details: {e}",
-        )
+        raise click.ClickException(DB_CONNECTION_ERROR.format(e))
 
 
-def _get_db_connection(db_url):
+def check_read_db_connection(db_url: str, read_db_urls: Sequence[str]) -> None:
+    """
+    Checks that any of the read databases is available,
+    so that the primary database is not connected to when it is not used.
+    The primary database is checked if none of the read databases is available.
+    """
+    for read_db_url in read_db_urls:
+        try:
+            _check_db_connection(read_db_url)
+            return
+        except psycopg2.OperationalError as e:
+            click.secho(
+                f"Failed to connect to the read database {urlparse(read_db_url).hostname}: {e}",
+                fg="red",
+            )
+
+    check_db_connection(db_url)
+
+
+def _check_db_connection(db_url: str) -> None:
+    connection = _get_db_connection(db_url=db_url)
+    try:
+        with connection.cursor() as cur:
+            cur.execute("SELECT 1")
+    finally:
+        connection.close()
+
+
+def _get_db_connection_params(db_url) -> Dict:
     result = urlparse(db_url)
-    return psycopg2.connect(
+    return dict(
         database=result.path[1:],
         user=result.username,
         password=result.password,
         host=result.hostname,
         port=result.port,
     )
+
+
+def _get_db_connection(db_url):
+    return psycopg2.connect(**_get_db_connection_params(db_url))
+
+
+@backoff.on_exception(
+    backoff.expo, psycopg2.OperationalError, max_value=LISTEN_RECONNECT_MAX_DELAY
+)
+def _get_listen_connection(db_url) -> Connection:
+    """Connects to the database and subscribes to the keys updates until it succeeds."""
+    conn = _get_db_connection(db_url)
+    try:
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {KEYS_UPDATES_CHANNEL}")
+    except psycopg2.Error:
+        conn.close()
+        raise
+
+    return conn
@@ -1,24 +1,33 @@
 import errno
+import json
 import time
+from concurrent.futures import Future, ProcessPoolExecutor
 from functools import cached_property, lru_cache
 from os import listdir, makedirs
-from os.path import exists
+from os.path import exists, join
 from typing import Dict, Set
 
 import click
 from eth_typing import ChecksumAddress, HexStr
+from eth_utils import add_0x_prefix
 from py_ecc.bls import G2ProofOfPossession
-from staking_deposit.key_handling.keystore import ScryptKeystore
 from web3 import Web3
 
 from stakewise_cli.eth1 import (
     get_operator_deposit_data_ipfs_link,
     is_validator_registered,
 )
-from stakewise_cli.eth2 import generate_password, get_mnemonic_signing_key
+from stakewise_cli.eth2 import (
+    DEFAULT_KDF_COST,
+    KDF_SCRYPT,
+    encrypt_keystore,
+    generate_password,
+    get_mnemonic_signing_key,
+)
 from stakewise_cli.ipfs import ipfs_fetch
 from stakewise_cli.queries import get_ethereum_gql_client, get_stakewise_gql_client
-from stakewise_cli.settings import IS_LEGACY
+from stakewise_cli.settings import IS_LEGACY, WORKERS_COUNT
+from stakewise_cli.utils import write_file_atomically
 
 
 class LocalStorage(object):
@@ -28,8 +37,14 @@ class LocalStorage(object):
         operator: ChecksumAddress,
         network: str,
         mnemonic: str,
+        incremental: bool = False,
+        keystore_kdf: str = KDF_SCRYPT,
+        keystore_kdf_cost: int = DEFAULT_KDF_COST,
     ):
         self.dst_folder = dst_folder
+        self.incremental = incremental
+        self.keystore_kdf = keystore_kdf
+        self.keystore_kdf_cost = keystore_kdf_cost
         self.eth_gql_client = get_ethereum_gql_client(network)
         self.sw_gql_client = get_stakewise_gql_client(network)
         self.mnemonic = mnemonic
@@ -56,11 +71,34 @@ class LocalStorage(object):
 
         return result
 
+    @cached_property
+    def local_public_keys(self) -> Set[HexStr]:
+        """Returns public keys of the keystores in the local folder without decrypting them."""
+        result: Set[HexStr] = set()
+        keystores_folder = join(self.dst_folder, "keystores")
+        if not exists(keystores_folder):
+            return result
+
+        for file_name in listdir(keystores_folder):
+            if not file_name.endswith(".json"):
+                continue
+
+            try:
+                with open(join(keystores_folder, file_name)) as file:
+                    public_key = json.load(file)["pubkey"]
+            except (OSError, ValueError, KeyError):
+                raise click.ClickException(
+                    f"Failed to read the public key from {file_name} keystore"
+                )
+            result.add(add_0x_prefix(HexStr(public_key)))
+
+        return result
+
     @cached_property
     def deposit_data_keystores(self) -> Dict[str, str]:
         """
         Returns mapping of keystore name to string-encoded keystore file
-        that are in the latest deposit data.
+        that are in the latest deposit data and missing in the local folder.
         """
         keystores: Dict[str, str] = {}
         keys_count = len(self.operator_deposit_data_public_keys)
@@ -68,44 +106,63 @@ class LocalStorage(object):
             return keystores
 
         from_index = 0
-        with click.progressbar(
-            length=keys_count,
-            label="Syncing deposit data keystores\t\t",
-            show_percent=False,
-            show_pos=True,
-        ) as bar:
-            while True:
-                signing_key = get_mnemonic_signing_key(
-                    self.mnemonic, from_index, IS_LEGACY
-                )
-                public_key = Web3.toHex(G2ProofOfPossession.SkToPk(signing_key.key))
-                if public_key not in self.operator_deposit_data_public_keys:
-                    break
+        password = self.get_or_create_keystore_password()
+        futures: Dict[str, Future] = {}
+        with ProcessPoolExecutor(max_workers=WORKERS_COUNT) as executor:
+            # keystores are encrypted in the background while the keys are checked
+            with click.progressbar(
+                length=keys_count,
+                label="Syncing deposit data keystores\t\t",
+                show_percent=False,
+                show_pos=True,
+            ) as bar:
+                while True:
+                    signing_key = get_mnemonic_signing_key(
+                        self.mnemonic, from_index, IS_LEGACY
+                    )
+                    public_key = Web3.toHex(G2ProofOfPossession.SkToPk(signing_key.key))
+                    if public_key not in self.operator_deposit_data_public_keys:
+                        break
 
-                is_registered = is_validator_registered(
-                    gql_client=self.eth_gql_client, public_key=public_key
-                )
-                if is_registered:
-                    click.secho(
-                        f"Public key {public_key} is in deposit data and already in use, skipping...",
-                        bold=True,
-                        fg="red",
+                    from_index += 1
+                    if public_key in self.local_public_keys:
+                        bar.update(1)
+                        continue
+
+                    is_registered = is_validator_registered(
+                        gql_client=self.eth_gql_client, public_key=public_key
+                    )
+                    if is_registered:
+                        click.secho(
+                            f"Public key {public_key} is in deposit data and already in use, skipping...",
+                            bold=True,
+                            fg="red",
+                        )
+                        bar.update(1)
+                        continue
+
+                    keystore_name = "keystore-%s-%i.json" % (
+                        signing_key.path.replace("/", "_"),
+                        time.time(),
+                    )
+                    futures[keystore_name] = executor.submit(
+                        encrypt_keystore,
+                        private_key=signing_key.key,
+                        password=password,
+                        path=signing_key.path,
+                        kdf=self.keystore_kdf,
+                        kdf_cost=self.keystore_kdf_cost,
                     )
                     bar.update(1)
-                    continue
-
-                secret = signing_key.key.to_bytes(32, "big")
-                password = self.get_or_create_keystore_password()
-                keystore = ScryptKeystore.encrypt(
-                    secret=secret, password=password, path=signing_key.path
-                ).as_json()
-                keystore_name = "keystore-%s-%i.json" % (
-                    signing_key.path.replace("/", "_"),
-                    time.time(),
-                )
-                keystores[keystore_name] = keystore
-                from_index += 1
-                bar.update(1)
+
+            with click.progressbar(
+                futures.items(),
+                label="Encrypting deposit data keystores\t\t",
+                show_percent=False,
+                show_pos=True,
+            ) as _futures:
+                for keystore_name, future in _futures:
+                    keystores[keystore_name] = future.result()
 
         return keystores
 
@@ -126,7 +183,11 @@ class LocalStorage(object):
     def apply_local_changes(self) -> None:
         """Updates local from current state to new state."""
 
-        if exists(self.dst_folder) and len(listdir(self.dst_folder)) > 1:
+        if (
+            not self.incremental
+            and exists(self.dst_folder)
+            and len(listdir(self.dst_folder)) > 1
+        ):
             raise click.ClickException(f"{self.dst_folder} must be empty")
 
         try:
@@ -139,7 +200,7 @@ class LocalStorage(object):
         self.save_local_keystores()
 
     def save_local_keystores(self) -> None:
-        """Saves latest deposit data keystores to local folder."""
+        """Saves missing deposit data keystores to local folder."""
         if not self.deposit_data_keystores:
             return
 
@@ -151,5 +212,5 @@ class LocalStorage(object):
             show_pos=True,
         ) as keystores:
             for name, keystore in keystores:
-                with open(f"{self.dst_folder}/keystores/{name}", "w") as file:
-                    file.write(keystore)
+                # interrupted runs don't leave partial keystores
+                write_file_atomically(f"{self.dst_folder}/keystores/{name}", keystore)
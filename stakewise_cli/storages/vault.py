@@ -1,9 +1,15 @@
 import collections
-import copy
+import hashlib
+import hmac
 import json
+import os
+import secrets
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from functools import cached_property, lru_cache
-from typing import Dict, OrderedDict, Set
+from os import makedirs
+from os.path import dirname, join
+from typing import Callable, Dict, List, Mapping, Optional, OrderedDict, Set, Tuple
 
 import click
 from eth_typing import BLSPubkey, ChecksumAddress, HexStr
@@ -11,7 +17,7 @@ from eth_utils import add_0x_prefix
 from hvac import Client as VaultClient
 from hvac.exceptions import InvalidPath
 from py_ecc.bls import G2ProofOfPossession
-from staking_deposit.key_handling.keystore import ScryptKeystore
+from staking_deposit.key_handling.keystore import Keystore
 from web3 import Web3
 from web3.beacon import Beacon
 
@@ -21,17 +27,45 @@ from stakewise_cli.eth1 import (
 )
 from stakewise_cli.eth2 import (
     COIN_TYPE,
+    DEFAULT_KDF_COST,
     EXITED_STATUSES,
+    KDF_SCRYPT,
     PURPOSE,
+    encrypt_keystore,
     generate_password,
+    get_keystore_public_key,
     get_mnemonic_signing_key,
     get_validators,
 )
 from stakewise_cli.ipfs import ipfs_fetch
 from stakewise_cli.networks import NETWORKS
+from stakewise_cli.placement import ValidatorsScheduler
 from stakewise_cli.queries import get_ethereum_gql_client, get_stakewise_gql_client
-from stakewise_cli.settings import IS_LEGACY, VAULT_VALIDATORS_MOUNT_POINT
+from stakewise_cli.settings import (
+    IS_LEGACY,
+    VAULT_CONCURRENCY,
+    VAULT_RATE_LIMIT,
+    VAULT_VALIDATORS_MOUNT_POINT,
+    VERIFIED_KEYSTORES_LEDGER_DIR,
+    WORKERS_COUNT,
+)
 from stakewise_cli.typings import SigningKey, VaultKeystore, VaultState
+from stakewise_cli.utils import (
+    OverlayDict,
+    RateLimiter,
+    get_digest,
+    write_file_atomically,
+)
+
+# all validator keystores are stored in the single "keystores" secret
+KEYSTORES_LAYOUT_SINGLE = "single"
+# every keystore is stored in its own secret under "keystores/" with the index secret
+KEYSTORES_LAYOUT_PER_KEYSTORE = "per-keystore"
+KEYSTORES_LAYOUTS = [KEYSTORES_LAYOUT_SINGLE, KEYSTORES_LAYOUT_PER_KEYSTORE]
+KEYSTORES_INDEX_SECRET = "keystores_index"
+
+LEDGER_KEY_FILENAME = ".ledger_key"
+LEDGER_KEY_LENGTH = 32
 
 VALIDATOR_POLICY = """
 path "%s/%s/*" {
@@ -40,15 +74,72 @@ path "%s/%s/*" {
 """
 
 
-def generate_validator_name(validator_names: Set[str]) -> str:
-    """Generates unique validator name."""
-    index = 0
-    name = f"validator{index}"
-    while name in validator_names:
-        index += 1
-        name = f"validator{index}"
+def _get_ledger_key(ledger_dir: str) -> bytes:
+    """
+    Returns the local secret key of the ledger, which is created on the first run.
+    The passwords are fingerprinted with the key, so that the ledger does not
+    allow checking the passwords without it.
+    """
+    key_path = join(ledger_dir, LEDGER_KEY_FILENAME)
+    makedirs(ledger_dir, exist_ok=True)
+    try:
+        fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        with open(key_path, "rb") as f:
+            return f.read()
+
+    key = secrets.token_bytes(LEDGER_KEY_LENGTH)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+def _get_keystore_hash(
+    ledger_key: bytes, keystore_path: str, keystore: str, password: str
+) -> str:
+    """
+    The hash changes when the password is changed,
+    as the keystore might not be decryptable with the new password.
+    """
+    password_fingerprint = hmac.new(
+        ledger_key, password.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+    return get_digest(keystore_path, keystore, password_fingerprint)
+
+
+def _load_verified_keystores(ledger_path: str) -> Set[str]:
+    """Loads hashes of the keystores verified in the previous runs."""
+    try:
+        with open(ledger_path) as f:
+            return set(json.load(f))
+    except (OSError, ValueError):
+        return set()
+
+
+def _save_verified_keystores(ledger_path: str, keystores_hashes: Set[str]) -> None:
+    """
+    Saves hashes of the verified keystores. The hashes of the removed
+    or changed keystores are dropped, as all the vault keystores are verified.
+    """
+    makedirs(dirname(ledger_path), exist_ok=True)
+    write_file_atomically(ledger_path, json.dumps(sorted(keystores_hashes)))
 
-    return name
+
+def get_keystore_mnemonic_index(keystore_path: str) -> int:
+    """Extracts the mnemonic derivation index from the keystore path."""
+    if not keystore_path.endswith("/0/0"):
+        return int(keystore_path.split("/")[-1])
+
+    return int(keystore_path.split("/")[3])
+
+
+def generate_keystore_name(keystore_path: str) -> str:
+    """Generates unique keystore name."""
+    if not keystore_path.endswith("/0/0"):
+        index = keystore_path.split("/")[-1]
+        keystore_path = f"m/{PURPOSE}/{COIN_TYPE}/{index}/0/0"
+
+    return "keystore-%s-%i.json" % (keystore_path.replace("/", "_"), time.time())
 
 
 class Vault(object):
@@ -60,6 +151,10 @@ class Vault(object):
         network: str,
         mnemonic: str,
         namespace: str,
+        rebalance: bool = False,
+        keystores_layout: str = KEYSTORES_LAYOUT_SINGLE,
+        keystore_kdf: str = KDF_SCRYPT,
+        keystore_kdf_cost: int = DEFAULT_KDF_COST,
     ):
         self.vault_client = vault_client
         self.network = network
@@ -68,6 +163,12 @@ class Vault(object):
         self.beacon = beacon
         self.mnemonic = mnemonic
         self.namespace = namespace
+        self.rebalance = rebalance
+        self.keystores_layout = keystores_layout
+        self.keystore_kdf = keystore_kdf
+        self.keystore_kdf_cost = keystore_kdf_cost
+        # validators that must be migrated from the single keystores secret layout
+        self.validators_to_migrate: Set[str] = set()
         self.max_keys_per_validator = NETWORKS[network]["MAX_KEYS_PER_VALIDATOR"]
         self.operator_address = operator
         self.check_mnemonic()
@@ -83,41 +184,155 @@ class Vault(object):
         except InvalidPath:
             return set()
 
+    def read_secrets(self, paths: List[str], label: str) -> Dict[str, Dict[str, str]]:
+        """
+        Reads secrets concurrently.
+        Returns mapping of secret path to the secret data. Missing secrets are skipped.
+        """
+
+        def read_secret(path: str) -> Optional[Dict[str, str]]:
+            try:
+                return self.vault_client.secrets.kv.read_secret(
+                    path=path,
+                    mount_point=VAULT_VALIDATORS_MOUNT_POINT,
+                )["data"]
+            except InvalidPath:
+                return None
+
+        result: Dict[str, Dict[str, str]] = {}
+        with ThreadPoolExecutor(max_workers=VAULT_CONCURRENCY) as executor:
+            with click.progressbar(
+                zip(paths, executor.map(read_secret, paths)),
+                length=len(paths),
+                label=label,
+                show_percent=False,
+                show_pos=True,
+            ) as secrets:
+                for path, data in secrets:
+                    if data is not None:
+                        result[path] = data
+
+        return result
+
+    def read_validators_secrets(
+        self, validator_names: Set[str], secret_name: str, label: str
+    ) -> Dict[str, Dict[str, str]]:
+        """
+        Reads validators secrets concurrently.
+        Returns mapping of validator name to the secret data. Missing secrets are skipped.
+        """
+        names = sorted(validator_names)
+        secrets = self.read_secrets(
+            paths=[f"{validator_name}/{secret_name}" for validator_name in names],
+            label=label,
+        )
+        return {
+            validator_name: secrets[f"{validator_name}/{secret_name}"]
+            for validator_name in names
+            if f"{validator_name}/{secret_name}" in secrets
+        }
+
+    def read_validators_keystores(
+        self, validator_names: Set[str], label: str
+    ) -> Dict[str, Dict[str, str]]:
+        """Reads mapping of validator name to its keystores for the selected layout."""
+        if self.keystores_layout == KEYSTORES_LAYOUT_SINGLE:
+            result = self.read_validators_secrets(
+                validator_names=validator_names, secret_name="keystores", label=label
+            )
+            indexes = self.read_validators_secrets(
+                validator_names=validator_names.difference(result.keys()),
+                secret_name=KEYSTORES_INDEX_SECRET,
+                label="Checking vault keystores layout\t\t",
+            )
+            if indexes:
+                raise click.ClickException(
+                    f"Vault validators {','.join(sorted(indexes))} use the"
+                    f" {KEYSTORES_LAYOUT_PER_KEYSTORE} keystores layout."
+                )
+            return result
+
+        indexes = self.read_validators_secrets(
+            validator_names=validator_names,
+            secret_name=KEYSTORES_INDEX_SECRET,
+            label=label,
+        )
+
+        # validators without index still use the single secret layout
+        result = self.read_validators_secrets(
+            validator_names=validator_names.difference(indexes.keys()),
+            secret_name="keystores",
+            label="Fetching vault keystores to migrate\t\t",
+        )
+        self.validators_to_migrate.update(result.keys())
+
+        keystores = self.read_secrets(
+            paths=[
+                f"{validator_name}/keystores/{keystore_name}"
+                for validator_name, index in sorted(indexes.items())
+                for keystore_name in index
+            ],
+            label="Fetching vault keystores\t\t",
+        )
+        for validator_name, index in indexes.items():
+            validator_keystores: Dict[str, str] = {}
+            for keystore_name in index:
+                path = f"{validator_name}/keystores/{keystore_name}"
+                if path not in keystores:
+                    raise click.ClickException(
+                        f"Vault keystore {path} is presented in the index but missing"
+                    )
+                validator_keystores[keystore_name] = keystores[path][keystore_name]
+            result[validator_name] = validator_keystores
+
+        return result
+
+    @cached_property
+    def vault_validators_keystores(self) -> Dict[str, Dict[str, str]]:
+        """
+        Returns mapping of vault validator names to their keystores secrets.
+        The entries are dropped once the secrets are updated.
+        """
+        return self.read_validators_keystores(
+            validator_names=self.vault_validator_names,
+            label="Fetching vault current state\t\t",
+        )
+
+    @cached_property
+    def vault_validators_passwords(self) -> Dict[str, str]:
+        """Returns mapping of vault validator names to their keystores passwords."""
+        passwords = self.read_validators_secrets(
+            validator_names=self.vault_validator_names,
+            secret_name="password",
+            label="Fetching vault keystores passwords\t\t",
+        )
+        return {
+            validator_name: data["password.txt"]
+            for validator_name, data in passwords.items()
+        }
+
     @cached_property
     def vault_current_state(self) -> VaultState:
         """Returns mappings of vault public keys to keystores."""
         result: VaultState = {}
-        with click.progressbar(
-            self.vault_validator_names,
-            label="Fetching vault current state\t\t",
-            show_percent=False,
-            show_pos=True,
-        ) as validator_names:
-            for validator_name in validator_names:
-                try:
-                    validator_keystores: Dict[
-                        str, str
-                    ] = self.vault_client.secrets.kv.read_secret(
-                        path=f"{validator_name}/keystores",
-                        mount_point=VAULT_VALIDATORS_MOUNT_POINT,
-                    )[
-                        "data"
-                    ]
-                except InvalidPath:
-                    continue
-
-                for keystore_str in validator_keystores.values():
-                    keystore = json.loads(keystore_str)
-                    public_key = add_0x_prefix(HexStr(keystore["pubkey"]))
-                    if public_key in result:
-                        raise click.ClickException(
-                            f"Public key {public_key} is presented in {validator_name}"
-                            f" and {result[public_key]} vault validators."
-                            f" You must immediately stop both validators to avoid slashing!"
-                        )
-                    result[public_key] = VaultKeystore(
-                        validator_name=validator_name, keystore=keystore_str
+        for (
+            validator_name,
+            validator_keystores,
+        ) in self.vault_validators_keystores.items():
+            for keystore_name, keystore_str in validator_keystores.items():
+                keystore = json.loads(keystore_str)
+                public_key = add_0x_prefix(HexStr(keystore["pubkey"]))
+                if public_key in result:
+                    raise click.ClickException(
+                        f"Public key {public_key} is presented in {validator_name}"
+                        f" and {result[public_key]} vault validators."
+                        f" You must immediately stop both validators to avoid slashing!"
                     )
+                result[public_key] = VaultKeystore(
+                    validator_name=validator_name,
+                    keystore_name=keystore_name,
+                    keystore=keystore_str,
+                )
 
         return result
 
@@ -235,8 +450,8 @@ class Vault(object):
         return result
 
     @cached_property
-    def vault_new_state(self) -> VaultState:
-        """Calculates vault new state."""
+    def vault_new_state(self) -> OverlayDict[HexStr, VaultKeystore]:
+        """Calculates vault new state as the changes over the current state."""
         validator_keys_count: Dict[str, int] = collections.Counter(
             [
                 keystore["validator_name"]
@@ -244,23 +459,12 @@ class Vault(object):
             ]
         )
 
-        # allocate new validator clients if not enough capacity
-        total_capacity = self.max_keys_per_validator * len(validator_keys_count)
-        available_slots = (
-            total_capacity
-            - sum(validator_keys_count.values())
-            - len(self.operator_exited_public_keys)
+        new_state: OverlayDict[HexStr, VaultKeystore] = OverlayDict(
+            self.vault_current_state
         )
-        while available_slots < len(self.vault_missing_keypairs):
-            new_validator_name = generate_validator_name(
-                set(validator_keys_count.keys())
-            )
-            validator_keys_count[new_validator_name] = 0
-            available_slots += self.max_keys_per_validator
-
-        new_state = copy.deepcopy(self.vault_current_state)
 
         # get rid of exited validator keys
+        exited_keys_count: Dict[str, int] = collections.Counter()
         for exited_public_key in self.operator_exited_public_keys:
             if exited_public_key in new_state:
                 validator_name = self.vault_current_state[exited_public_key][
@@ -269,33 +473,130 @@ class Vault(object):
                 del new_state[exited_public_key]
 
                 validator_keys_count[validator_name] -= 1
+                exited_keys_count[validator_name] += 1
+
+        # allocate new validator clients if not enough capacity
+        scheduler = ValidatorsScheduler(
+            keys_counts=validator_keys_count,
+            capacity=self.max_keys_per_validator,
+            holes=exited_keys_count,
+        )
+        scheduler.reserve(len(self.vault_missing_keypairs))
 
         # distribute missing keypairs across validators
-        with click.progressbar(
-            self.vault_missing_keypairs,
-            label="Provisioning missing validator keys\t\t",
-            show_percent=False,
-            show_pos=True,
-        ) as missing_keypairs:
-            for public_key in missing_keypairs:
-                validator_name = min(validator_keys_count, key=validator_keys_count.get)  # type: ignore
-                if public_key not in new_state:
-                    signing_key = self.vault_missing_keypairs[public_key]
-                    secret = signing_key.key.to_bytes(32, "big")
-                    password = self.get_or_create_keystore_password(validator_name)
-                    keystore = ScryptKeystore.encrypt(
-                        secret=secret, password=password, path=signing_key.path
-                    ).as_json()
+        signing_keys: Dict[HexStr, SigningKey] = dict(self.vault_missing_keypairs)
+        placements: List[Tuple[HexStr, str]] = []
+        for public_key in self.vault_missing_keypairs:
+            if public_key not in new_state:
+                placements.append((public_key, scheduler.place()))
+
+        if self.rebalance:
+            moved_keys = self.get_rebalance_placements(
+                scheduler=scheduler, state=new_state, placements=placements
+            )
+            for public_key, _ in moved_keys:
+                keystore = json.loads(new_state[public_key]["keystore"])
+                signing_keys[public_key] = get_mnemonic_signing_key(
+                    mnemonic=self.mnemonic,
+                    from_index=get_keystore_mnemonic_index(keystore["path"]),
+                    is_legacy=IS_LEGACY,
+                )
+            placements.extend(moved_keys)
+
+        # encrypt keystores in parallel
+        placed_signing_keys = [signing_keys[public_key] for public_key, _ in placements]
+        passwords = [
+            self.get_or_create_keystore_password(validator_name)
+            for _, validator_name in placements
+        ]
+        with ProcessPoolExecutor(max_workers=WORKERS_COUNT) as executor:
+            with click.progressbar(
+                executor.map(
+                    encrypt_keystore,
+                    [signing_key.key for signing_key in placed_signing_keys],
+                    passwords,
+                    [signing_key.path for signing_key in placed_signing_keys],
+                    [self.keystore_kdf] * len(placements),
+                    [self.keystore_kdf_cost] * len(placements),
+                ),
+                length=len(placements),
+                label="Provisioning missing validator keys\t\t",
+                show_percent=False,
+                show_pos=True,
+            ) as keystores:
+                for (public_key, validator_name), signing_key, keystore in zip(
+                    placements, placed_signing_keys, keystores
+                ):
                     new_state[public_key] = VaultKeystore(
-                        validator_name=validator_name, keystore=keystore
+                        validator_name=validator_name,
+                        keystore_name=generate_keystore_name(signing_key.path),
+                        keystore=keystore,
                     )
-                    validator_keys_count[validator_name] += 1
 
         return new_state
 
+    def get_rebalance_placements(
+        self,
+        scheduler: ValidatorsScheduler,
+        state: Mapping[HexStr, VaultKeystore],
+        placements: List[Tuple[HexStr, str]],
+    ) -> List[Tuple[HexStr, str]]:
+        """
+        Distributes keys evenly across the validators with the minimal number of movements.
+        Reassigns the new keys first, returns the existing keys that must be moved.
+        """
+        new_keys: Dict[str, List[int]] = {}
+        for i, (_, validator_name) in enumerate(placements):
+            new_keys.setdefault(validator_name, []).append(i)
+
+        existing_keys: Dict[str, List[HexStr]] = {}
+        for public_key in sorted(state):
+            validator_name = state[public_key]["validator_name"]
+            existing_keys.setdefault(validator_name, []).append(public_key)
+
+        moved_keys: List[Tuple[HexStr, str]] = []
+        for from_name, to_name in scheduler.rebalance():
+            if new_keys.get(from_name):
+                i = new_keys[from_name].pop()
+                placements[i] = (placements[i][0], to_name)
+            else:
+                moved_keys.append((existing_keys[from_name].pop(), to_name))
+
+        if moved_keys:
+            # the key loaded by the running validator must not be started by another one
+            from_names = ", ".join(
+                sorted(
+                    {
+                        state[public_key]["validator_name"]
+                        for public_key, _ in moved_keys
+                    }
+                )
+            )
+            to_names = ", ".join(sorted({to_name for _, to_name in moved_keys}))
+            click.secho(
+                f"Rebalancing moves {len(moved_keys)} validator keys from {from_names}"
+                f" to {to_names}. Running the same key in two validators causes slashing:\n"
+                f"  1. Stop {from_names} before continuing.\n"
+                f"  2. Keep them stopped until the helm chart is upgraded with the new keys.\n"
+                f"  3. Start {to_names} with the moved keys not earlier than 2 epochs after"
+                f" stopping, as the slashing protection history is not moved with the keys.",
+                bold=True,
+                fg="red",
+            )
+            click.confirm(
+                f"Confirm that {from_names} are stopped",
+                default=False,
+                abort=True,
+            )
+
+        return moved_keys
+
     @lru_cache
     def get_or_create_keystore_password(self, validator_name) -> str:
         """Retrieves validator keystore password if exists or creates a new one."""
+        if validator_name in self.vault_validators_passwords:
+            return self.vault_validators_passwords[validator_name]
+
         try:
             password = self.vault_client.secrets.kv.read_secret(
                 path=f"{validator_name}/password",
@@ -319,8 +620,80 @@ class Vault(object):
         # sync keystores
         self.sync_vault_keystores()
 
+    def send_requests(self, requests: List[Tuple[Callable, Dict]], label: str) -> None:
+        """Sends vault write requests concurrently with the rate limit."""
+        rate_limiter = RateLimiter(VAULT_RATE_LIMIT)
+
+        def send_request(request: Tuple[Callable, Dict]) -> None:
+            func, kwargs = request
+            rate_limiter.wait()
+            func(**kwargs)
+
+        with ThreadPoolExecutor(max_workers=VAULT_CONCURRENCY) as executor:
+            with click.progressbar(
+                executor.map(send_request, requests),
+                length=len(requests),
+                label=label,
+                show_percent=False,
+                show_pos=True,
+            ) as results:
+                for _ in results:
+                    pass
+
+    def get_keystores_paths(self, validator_name: str) -> List[str]:
+        """Returns paths of all the validator keystores secrets."""
+        paths = [f"{validator_name}/keystores"]
+        if self.keystores_layout == KEYSTORES_LAYOUT_PER_KEYSTORE:
+            paths.append(f"{validator_name}/{KEYSTORES_INDEX_SECRET}")
+            if validator_name not in self.validators_to_migrate:
+                paths.extend(
+                    f"{validator_name}/keystores/{keystore_name}"
+                    for keystore_name in self.vault_validators_keystores.get(
+                        validator_name, {}
+                    )
+                )
+
+        return paths
+
+    def read_vault_policies(self, names: Set[str]) -> Dict[str, str]:
+        """Returns mapping of the existing vault policy names to their rules."""
+        existing_names = names.intersection(
+            self.vault_client.sys.list_policies()["data"]["policies"]
+        )
+
+        def read_policy(name: str) -> str:
+            return self.vault_client.sys.read_policy(name=name)["data"]["rules"]
+
+        names_list = sorted(existing_names)
+        with ThreadPoolExecutor(max_workers=VAULT_CONCURRENCY) as executor:
+            return dict(zip(names_list, executor.map(read_policy, names_list)))
+
+    def read_vault_kubernetes_roles(self, names: Set[str]) -> Dict[str, Dict]:
+        """Returns mapping of the existing vault kubernetes role names to their configs."""
+        try:
+            existing_names = names.intersection(
+                self.vault_client.auth.kubernetes.list_roles()["keys"]
+            )
+        except InvalidPath:
+            return {}
+
+        def read_role(name: str) -> Dict:
+            return self.vault_client.auth.kubernetes.read_role(name=name)
+
+        names_list = sorted(existing_names)
+        with ThreadPoolExecutor(max_workers=VAULT_CONCURRENCY) as executor:
+            return dict(zip(names_list, executor.map(read_role, names_list)))
+
+    def is_kubernetes_role_valid(self, validator_name: str, role: Dict) -> bool:
+        """Checks whether the kubernetes role grants access only to the validator."""
+        return (
+            role.get("bound_service_account_names") == [validator_name]
+            and role.get("bound_service_account_namespaces") == [self.namespace]
+            and (role.get("token_policies") or role.get("policies")) == [validator_name]
+        )
+
     def sync_vault_validators(self) -> None:
-        """Synchronizes vault validators."""
+        """Synchronizes vault validators policies and kubernetes roles that have changed."""
         prev_validators: Set[str] = set(
             [
                 keystore["validator_name"]
@@ -333,75 +706,216 @@ class Vault(object):
 
         removed_validators = prev_validators.difference(new_validators)
 
-        # sync validators
-        with click.progressbar(
-            length=len(new_validators) + len(removed_validators),
-            label="Syncing vault validator directories\t\t",
-            show_percent=False,
-            show_pos=True,
-        ) as bar:
-            for validator_name in removed_validators:
-                self.vault_client.sys.delete_policy(validator_name)
-                self.vault_client.delete_kubernetes_role(validator_name)
-                self.vault_client.secrets.kv.delete_secret(
-                    path=f"{validator_name}/password",
-                    mount_point=VAULT_VALIDATORS_MOUNT_POINT,
-                )
-                self.vault_client.secrets.kv.delete_secret(
-                    path=f"{validator_name}/keystores",
-                    mount_point=VAULT_VALIDATORS_MOUNT_POINT,
+        requests: List[Tuple[Callable, Dict]] = []
+        for validator_name in sorted(removed_validators):
+            requests.extend(
+                [
+                    (self.vault_client.sys.delete_policy, dict(name=validator_name)),
+                    (
+                        self.vault_client.delete_kubernetes_role,
+                        dict(role=validator_name),
+                    ),
+                    (
+                        self.vault_client.secrets.kv.delete_secret,
+                        dict(
+                            path=f"{validator_name}/password",
+                            mount_point=VAULT_VALIDATORS_MOUNT_POINT,
+                        ),
+                    ),
+                ]
+            )
+            requests.extend(
+                (
+                    self.vault_client.secrets.kv.delete_secret,
+                    dict(path=path, mount_point=VAULT_VALIDATORS_MOUNT_POINT),
                 )
-                bar.update(1)
+                for path in self.get_keystores_paths(validator_name)
+            )
+            self.vault_validators_keystores.pop(validator_name, None)
 
-            for validator_name in new_validators:
-                self.vault_client.sys.create_or_update_policy(
-                    name=validator_name,
-                    policy=VALIDATOR_POLICY
-                    % (VAULT_VALIDATORS_MOUNT_POINT, validator_name),
+        # write only missing or changed policies and roles
+        policies = self.read_vault_policies(new_validators)
+        roles = self.read_vault_kubernetes_roles(new_validators)
+        for validator_name in sorted(new_validators):
+            policy = VALIDATOR_POLICY % (VAULT_VALIDATORS_MOUNT_POINT, validator_name)
+            if policies.get(validator_name) != policy:
+                requests.append(
+                    (
+                        self.vault_client.sys.create_or_update_policy,
+                        dict(name=validator_name, policy=policy),
+                    )
                 )
-                self.vault_client.auth.kubernetes.create_role(
-                    name=validator_name,
-                    policies=[validator_name],
-                    bound_service_account_names=validator_name,
-                    bound_service_account_namespaces=self.namespace,
+
+            role = roles.get(validator_name)
+            if role is None or not self.is_kubernetes_role_valid(validator_name, role):
+                requests.append(
+                    (
+                        self.vault_client.auth.kubernetes.create_role,
+                        dict(
+                            name=validator_name,
+                            policies=[validator_name],
+                            bound_service_account_names=validator_name,
+                            bound_service_account_namespaces=self.namespace,
+                        ),
+                    )
                 )
-                bar.update(1)
+
+        # sync validators
+        self.send_requests(
+            requests=requests, label="Syncing vault validator directories\t\t"
+        )
 
     def sync_vault_keystores(self) -> None:
-        """Synchronizes vault keystores."""
-        validators_keystores: Dict[str, Dict[str, str]] = {}
-        for public_key, vault_keystore in self.vault_new_state.items():
-            validator_name = vault_keystore["validator_name"]
-            keystores = validators_keystores.setdefault(validator_name, {})
-            keystore = vault_keystore["keystore"]
-            keystore_path = json.loads(keystore)["path"]
-
-            if not keystore_path.endswith("/0/0"):
-                index = keystore_path.split("/")[-1]
-                keystore_path = f"m/{PURPOSE}/{COIN_TYPE}/{index}/0/0"
-
-            # generate unique keystore name
-            keystore_name = "keystore-%s-%i.json" % (
-                keystore_path.replace("/", "_"),
-                time.time(),
+        """Synchronizes vault keystores of the validators that have changed."""
+        new_state = self.vault_new_state
+        changed_validators: Set[str] = set(
+            self.vault_current_state[public_key]["validator_name"]
+            for public_key in new_state.removed
+        )
+        changed_validators.update(
+            vault_keystore["validator_name"]
+            for vault_keystore in new_state.added.values()
+        )
+
+        # apply the changes to the current keystores of the changed validators only
+        new_keystores: Dict[str, Dict[str, str]] = {
+            validator_name: dict(
+                self.vault_validators_keystores.get(validator_name, {})
+            )
+            for validator_name in changed_validators
+        }
+        for public_key in new_state.removed:
+            vault_keystore = self.vault_current_state[public_key]
+            new_keystores[vault_keystore["validator_name"]].pop(
+                vault_keystore["keystore_name"], None
             )
+        for vault_keystore in new_state.added.values():
+            new_keystores[vault_keystore["validator_name"]][
+                vault_keystore["keystore_name"]
+            ] = vault_keystore["keystore"]
 
-            # save keystore
-            keystores[keystore_name] = keystore
+        changed_validators = set(
+            validator_name
+            for validator_name, keystores in new_keystores.items()
+            if keystores
+            and keystores != self.vault_validators_keystores.get(validator_name)
+        )
+
+        if self.keystores_layout == KEYSTORES_LAYOUT_PER_KEYSTORE:
+            # validators in the single secret layout are rewritten completely
+            for validator_name in self.validators_to_migrate:
+                keystores = new_keystores.get(
+                    validator_name,
+                    self.vault_validators_keystores.get(validator_name, {}),
+                )
+                if keystores:
+                    new_keystores[validator_name] = keystores
+                    changed_validators.add(validator_name)
+
+            self.sync_vault_keystores_secrets(
+                {
+                    validator_name: new_keystores[validator_name]
+                    for validator_name in changed_validators
+                }
+            )
+            return
 
         # sync keystores in vault
         with click.progressbar(
-            validators_keystores,
+            sorted(changed_validators),
             label="Syncing vault keystores\t\t",
             show_percent=False,
             show_pos=True,
-        ) as _validators_keystores:
-            for validator_name in _validators_keystores:
+        ) as _changed_validators:
+            for validator_name in _changed_validators:
                 self.vault_client.secrets.kv.create_or_update_secret(
                     path=f"{validator_name}/keystores",
-                    secret=validators_keystores[validator_name],
+                    secret=new_keystores[validator_name],
                     mount_point=VAULT_VALIDATORS_MOUNT_POINT,
                 )
+                self.vault_validators_keystores.pop(validator_name, None)
+
+    def sync_vault_keystores_secrets(
+        self, new_keystores: Dict[str, Dict[str, str]]
+    ) -> None:
+        """
+        Synchronizes vault keystores stored in separate secrets.
+        The keystores are written before the index and removed after it,
+        so that the index always points to the existing keystores.
+        """
+        kv = self.vault_client.secrets.kv
+        write_requests: List[Tuple[Callable, Dict]] = []
+        index_requests: List[Tuple[Callable, Dict]] = []
+        delete_requests: List[Tuple[Callable, Dict]] = []
+        for validator_name, keystores in sorted(new_keystores.items()):
+            is_migrated = validator_name in self.validators_to_migrate
+            current_keystores = (
+                {}
+                if is_migrated
+                else self.vault_validators_keystores.get(validator_name, {})
+            )
+            index: Dict[str, str] = {}
+            for keystore_name, keystore in keystores.items():
+                index[keystore_name] = json.loads(keystore)["pubkey"]
+                if current_keystores.get(keystore_name) != keystore:
+                    write_requests.append(
+                        (
+                            kv.create_or_update_secret,
+                            dict(
+                                path=f"{validator_name}/keystores/{keystore_name}",
+                                secret={keystore_name: keystore},
+                                mount_point=VAULT_VALIDATORS_MOUNT_POINT,
+                            ),
+                        )
+                    )
+
+            index_requests.append(
+                (
+                    kv.create_or_update_secret,
+                    dict(
+                        path=f"{validator_name}/{KEYSTORES_INDEX_SECRET}",
+                        secret=index,
+                        mount_point=VAULT_VALIDATORS_MOUNT_POINT,
+                    ),
+                )
+            )
+            if is_migrated:
+                delete_requests.append(
+                    (
+                        kv.delete_secret,
+                        dict(
+                            path=f"{validator_name}/keystores",
+                            mount_point=VAULT_VALIDATORS_MOUNT_POINT,
+                        ),
+                    )
+                )
+
+            delete_requests.extend(
+                (
+                    kv.delete_secret,
+                    dict(
+                        path=f"{validator_name}/keystores/{keystore_name}",
+                        mount_point=VAULT_VALIDATORS_MOUNT_POINT,
+                    ),
+                )
+                for keystore_name in current_keystores
+                if keystore_name not in keystores
+            )
+
+        self.send_requests(write_requests, label="Syncing vault keystores\t\t")
+        self.send_requests(index_requests, label="Syncing vault keystores indexes\t\t")
+        self.send_requests(delete_requests, label="Removing vault stale keystores\t\t")
+        for validator_name in new_keystores:
+            self.vault_validators_keystores.pop(validator_name, None)
+            self.validators_to_migrate.discard(validator_name)
+
+    @cached_property
+    def verified_keystores_ledger_path(self) -> str:
+        """The verified keystores are tracked separately for every vault and namespace."""
+        vault_id = get_digest(
+            self.vault_client.url, VAULT_VALIDATORS_MOUNT_POINT, self.namespace
+        )
+        return join(VERIFIED_KEYSTORES_LEDGER_DIR, f"{vault_id}.json")
 
     def verify_vault_keystores(self) -> None:
         # clean up cached property
@@ -411,7 +925,23 @@ class Vault(object):
         except AttributeError:
             pass
 
+        verified_keystores = _load_verified_keystores(
+            self.verified_keystores_ledger_path
+        )
+        ledger_key = _get_ledger_key(VERIFIED_KEYSTORES_LEDGER_DIR)
         public_keys: Set[BLSPubkey] = set()
+        keystores_hashes: Set[str] = set()
+        unverified_keystores: List[Tuple[str, str, str, str, BLSPubkey]] = []
+
+        # re-read only the keystores that were updated during the sync
+        self.vault_validators_keystores.update(
+            self.read_validators_keystores(
+                validator_names=self.vault_validator_names.difference(
+                    self.vault_validators_keystores.keys()
+                ),
+                label="Fetching vault updated keystores\t\t",
+            )
+        )
         with click.progressbar(
             self.vault_validator_names,
             label="Verifying vault state\t\t",
@@ -419,37 +949,66 @@ class Vault(object):
             show_pos=True,
         ) as validator_names:
             for validator_name in validator_names:
-                try:
-                    validator_keystores: Dict[
-                        str, str
-                    ] = self.vault_client.secrets.kv.read_secret(
-                        path=f"{validator_name}/keystores",
-                        mount_point=VAULT_VALIDATORS_MOUNT_POINT,
-                    )[
-                        "data"
-                    ]
-                except InvalidPath:
+                validator_keystores = self.vault_validators_keystores.get(
+                    validator_name
+                )
+                if validator_keystores is None:
                     continue
 
+                password = self.get_or_create_keystore_password(validator_name)
                 for keystore_name, keystore_str in validator_keystores.items():
                     keystore = json.loads(keystore_str)
-                    password = self.get_or_create_keystore_password(validator_name)
-                    private_key = ScryptKeystore.from_json(keystore).decrypt(password)
-                    public_key = G2ProofOfPossession.SkToPk(
-                        int.from_bytes(private_key, byteorder="big")
-                    )
+                    public_key = BLSPubkey(Web3.toBytes(hexstr=keystore["pubkey"]))
                     if public_key in public_keys:
                         raise click.ClickException(
                             f"Public key {Web3.toHex(public_key)} is presented in multiple keystores"
                         )
-
                     public_keys.add(public_key)
-                    if Web3.toBytes(hexstr=keystore["pubkey"]) != public_key:
+
+                    keystore_hash = _get_keystore_hash(
+                        ledger_key,
+                        f"{validator_name}/{keystore_name}",
+                        keystore_str,
+                        password,
+                    )
+                    keystores_hashes.add(keystore_hash)
+                    if keystore_hash not in verified_keystores:
+                        unverified_keystores.append(
+                            (
+                                validator_name,
+                                keystore_name,
+                                keystore_str,
+                                password,
+                                public_key,
+                            )
+                        )
+
+        # decrypt keystores that were not verified before in parallel
+        with ProcessPoolExecutor(max_workers=WORKERS_COUNT) as executor:
+            with click.progressbar(
+                zip(
+                    unverified_keystores,
+                    executor.map(
+                        get_keystore_public_key,
+                        [keystore[2] for keystore in unverified_keystores],
+                        [keystore[3] for keystore in unverified_keystores],
+                    ),
+                ),
+                length=len(unverified_keystores),
+                label="Verifying vault keystores\t\t",
+                show_percent=False,
+                show_pos=True,
+            ) as results:
+                for keystore_details, derived_public_key in results:
+                    validator_name, keystore_name, _, _, public_key = keystore_details
+                    if derived_public_key != public_key:
                         # derived public key does not match the one in keystore
                         raise click.ClickException(
                             f"Failed to verify keystore {keystore_name} for validator {validator_name}"
                         )
 
+        _save_verified_keystores(self.verified_keystores_ledger_path, keystores_hashes)
+
     def check_mnemonic(self) -> None:
         """Checks whether the mnemonic is correct."""
         if not self.vault_current_state:
@@ -457,15 +1016,12 @@ class Vault(object):
 
         public_key1 = next(iter(self.vault_current_state))
         vault_keystore = self.vault_current_state[public_key1]
-        keystore = ScryptKeystore.from_json(json.loads(vault_keystore["keystore"]))
-
-        if not keystore.path.endswith("/0/0"):
-            from_index = keystore.path.split("/")[-1]
-        else:
-            from_index = int(keystore.path.split("/")[3])
+        keystore = Keystore.from_json(json.loads(vault_keystore["keystore"]))
 
         signing_key = get_mnemonic_signing_key(
-            mnemonic=self.mnemonic, from_index=from_index, is_legacy=IS_LEGACY
+            mnemonic=self.mnemonic,
+            from_index=get_keystore_mnemonic_index(keystore.path),
+            is_legacy=IS_LEGACY,
         )
         public_key2 = Web3.toHex(G2ProofOfPossession.SkToPk(signing_key.key))
 
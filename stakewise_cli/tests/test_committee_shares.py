@@ -0,0 +1,98 @@
+import unittest
+from unittest.mock import patch
+
+from click.testing import CliRunner
+from Crypto.PublicKey import RSA
+from py_ecc.bls import G2ProofOfPossession
+from py_ecc.optimized_bls12_381 import curve_order
+from web3 import Web3
+
+from stakewise_cli.committee_shares import (
+    create_committee_shares,
+    generate_bls_priv_key,
+    get_lagrange_coefficients,
+)
+from stakewise_cli.shards import read_shard_file
+from stakewise_cli.typings import KeyPair
+
+from .factories import faker
+
+w3 = Web3()
+
+keys_count = 7
+private_keys = [generate_bls_priv_key() for _ in range(keys_count)]
+keypairs = [
+    KeyPair(public_key=w3.toHex(G2ProofOfPossession.SkToPk(key)), private_key=key)
+    for key in private_keys
+]
+committee_sizes = [3, 2]
+rsa_keys = [[RSA.generate(1024) for _ in range(size)] for size in committee_sizes]
+committee = [
+    [
+        f"{key.publickey().export_key('OpenSSH').decode('ascii')} member{i}{j}"
+        for j, key in enumerate(keys)
+    ]
+    for i, keys in enumerate(rsa_keys)
+]
+
+
+def reconstruct_private_keys(shares, indexes):
+    """Reconstructs the private keys from the shares of the members with the indexes."""
+    coefficients = get_lagrange_coefficients(indexes)
+    return [
+        sum(c * share for c, share in zip(coefficients, key_shares)) % curve_order
+        for key_shares in zip(*shares)
+    ]
+
+
+@patch("stakewise_cli.committee_shares.get_operator_allocation_id", return_value=1)
+@patch("stakewise_cli.committee_shares.get_operators_committee", return_value=committee)
+class TestCreateCommitteeShares(unittest.TestCase):
+    def _create_committee_shares(self):
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            paths = create_committee_shares(
+                network="mainnet",
+                gql_client=None,  # type: ignore
+                operator=faker.eth_address(),
+                committee_folder="committee",
+                keypairs=keypairs,
+            )
+            committee_shares = [
+                [
+                    list(read_shard_file(paths[f"member{i}{j}"], key))
+                    for j, key in enumerate(keys)
+                ]
+                for i, keys in enumerate(rsa_keys)
+            ]
+        return committee_shares
+
+    def _check_committee_shares(self, committee_shares):
+        # any majority of the committee members reconstructs the committee shares
+        committees_private_keys = []
+        for members_shares in committee_shares:
+            threshold = len(members_shares) // 2 + 1
+            indexes = tuple(range(len(members_shares)))
+            committee_private_keys = reconstruct_private_keys(
+                members_shares[:threshold], indexes[:threshold]
+            )
+            assert (
+                reconstruct_private_keys(
+                    members_shares[-threshold:], indexes[-threshold:]
+                )
+                == committee_private_keys
+            )
+            committees_private_keys.append(committee_private_keys)
+
+        # all the committees reconstruct the keypairs in the original order
+        assert (
+            reconstruct_private_keys(
+                committees_private_keys, tuple(range(len(committee_sizes)))
+            )
+            == private_keys
+        )
+
+    def test_create_committee_shares(self, *mocks):
+        for workers_count in [1, 3]:
+            with patch("stakewise_cli.committee_shares.WORKERS_COUNT", workers_count):
+                self._check_committee_shares(self._create_committee_shares())
@@ -0,0 +1,88 @@
+import unittest
+from unittest.mock import patch
+
+from click.testing import CliRunner
+from Crypto.PublicKey import RSA
+from py_ecc.bls import G2ProofOfPossession
+from web3 import Web3
+
+from stakewise_cli.commands.create_shard_pubkeys import create_shard_pubkeys
+from stakewise_cli.committee_shares import generate_bls_priv_key, rsa_encrypt
+from stakewise_cli.shards import write_shard_file
+
+from .factories import faker
+
+w3 = Web3()
+
+ipfs_url = "/ipfs/" + faker.text(max_nb_chars=20)
+rsa_key = RSA.generate(2048)
+rsa_public_key = rsa_key.publickey().export_key("OpenSSH").decode("ascii")
+keys_count = 5
+private_keys = [generate_bls_priv_key() for _ in range(keys_count)]
+public_keys = [w3.toHex(G2ProofOfPossession.SkToPk(key)) for key in private_keys]
+
+
+@patch(
+    "stakewise_cli.commands.create_shard_pubkeys.upload_to_ipfs",
+    return_value=ipfs_url,
+)
+class TestCommand(unittest.TestCase):
+    def _call_command(self, write_shard):
+        runner = CliRunner()
+        args = ["--private-key", "./private.pem", "--shard", "./operator.shard"]
+        with runner.isolated_filesystem():
+            with open("./private.pem", "wb") as f:
+                f.write(rsa_key.export_key())
+            write_shard("./operator.shard")
+            return runner.invoke(create_shard_pubkeys, args)
+
+    @patch("stakewise_cli.shards.SHARD_CHUNK_SIZE", 2)
+    def test_create_shard_pubkeys(self, upload_mock, *mocks):
+        result = self._call_command(
+            lambda path: write_shard_file(path, rsa_public_key, private_keys)
+        )
+        assert result.exit_code == 0
+        assert ipfs_url in result.output
+        upload_mock.assert_called_once_with(public_keys)
+
+    @patch("stakewise_cli.commands.create_shard_pubkeys.PUBLIC_KEYS_CHUNK_SIZE", 1)
+    @patch("stakewise_cli.shards.SHARD_CHUNK_SIZE", 2)
+    def test_create_shard_pubkeys_workers(self, upload_mock, *mocks):
+        # the public keys derived in parallel are in the order of the shares
+        for workers_count in [1, 3]:
+            upload_mock.reset_mock()
+            with patch(
+                "stakewise_cli.commands.create_shard_pubkeys.WORKERS_COUNT",
+                workers_count,
+            ):
+                result = self._call_command(
+                    lambda path: write_shard_file(path, rsa_public_key, private_keys)
+                )
+            assert result.exit_code == 0
+            upload_mock.assert_called_once_with(public_keys)
+
+    def test_create_shard_pubkeys_legacy(self, upload_mock, *mocks):
+        def write_legacy_shard(path: str) -> None:
+            secret = ",".join(str(key) for key in private_keys)
+            with open(path, "wb") as f:
+                for data in rsa_encrypt(rsa_public_key, secret):
+                    f.write(data)
+
+        result = self._call_command(write_legacy_shard)
+        assert result.exit_code == 0
+        assert ipfs_url in result.output
+        upload_mock.assert_called_once_with(public_keys)
+
+    def test_create_shard_pubkeys_corrupted(self, upload_mock, *mocks):
+        def write_corrupted_shard(path: str) -> None:
+            write_shard_file(path, rsa_public_key, private_keys)
+            with open(path, "r+b") as f:
+                f.seek(-20, 2)
+                value = f.read(1)[0]
+                f.seek(-20, 2)
+                f.write(bytes([value ^ 0xFF]))
+
+        result = self._call_command(write_corrupted_shard)
+        assert result.exit_code == 1
+        assert "Failed to decrypt the shard file" in result.output
+        upload_mock.assert_not_called()
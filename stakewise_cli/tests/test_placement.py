@@ -0,0 +1,106 @@
+import unittest
+from collections import Counter
+
+from stakewise_cli.placement import (
+    ValidatorNamesIndex,
+    ValidatorsScheduler,
+    get_validator_name_index,
+)
+
+
+class TestValidatorNamesIndex(unittest.TestCase):
+    def test_get_validator_name_index(self):
+        assert get_validator_name_index("validator0") == 0
+        assert get_validator_name_index("validator12") == 12
+        assert get_validator_name_index("validator012") is None
+        assert get_validator_name_index("validator") is None
+        assert get_validator_name_index("custom1") is None
+
+    def test_allocate(self):
+        names_index = ValidatorNamesIndex(
+            ["validator0", "validator3", "validator05", "custom"]
+        )
+        allocated = [names_index.allocate() for _ in range(4)]
+        assert allocated == ["validator1", "validator2", "validator4", "validator5"]
+
+    def test_allocate_empty(self):
+        names_index = ValidatorNamesIndex([])
+        assert names_index.allocate() == "validator0"
+        assert names_index.allocate() == "validator1"
+
+
+class TestValidatorsScheduler(unittest.TestCase):
+    def test_place_fills_holes_first(self):
+        scheduler = ValidatorsScheduler(
+            keys_counts={"validator0": 3, "validator1": 1, "validator2": 2},
+            capacity=3,
+            holes={"validator2": 1},
+        )
+        assert scheduler.available_slots == 3
+        placed = [scheduler.place() for _ in range(4)]
+        assert placed == ["validator2", "validator1", "validator1", "validator3"]
+        assert scheduler.keys_counts == {
+            "validator0": 3,
+            "validator1": 3,
+            "validator2": 3,
+            "validator3": 1,
+        }
+
+    def test_place_least_loaded(self):
+        scheduler = ValidatorsScheduler(
+            keys_counts={"validator0": 2, "validator1": 0, "validator2": 1},
+            capacity=10,
+        )
+        placed = [scheduler.place() for _ in range(3)]
+        assert Counter(placed) == {"validator1": 2, "validator2": 1}
+        assert set(scheduler.keys_counts.values()) == {2}
+
+    def test_reserve(self):
+        scheduler = ValidatorsScheduler(
+            keys_counts={"validator0": 2, "validator1": 3}, capacity=3
+        )
+        scheduler.reserve(1)
+        assert len(scheduler.keys_counts) == 2
+
+        scheduler.reserve(5)
+        assert scheduler.keys_counts == {
+            "validator0": 2,
+            "validator1": 3,
+            "validator2": 0,
+            "validator3": 0,
+        }
+        assert scheduler.available_slots == 7
+
+    def test_rebalance(self):
+        scheduler = ValidatorsScheduler(
+            keys_counts={"validator0": 5, "validator1": 1, "validator2": 0},
+            capacity=10,
+        )
+        moves = scheduler.rebalance()
+        assert Counter(moves) == {
+            ("validator0", "validator1"): 1,
+            ("validator0", "validator2"): 2,
+        }
+        assert set(scheduler.keys_counts.values()) == {2}
+
+    def test_rebalance_remainder(self):
+        scheduler = ValidatorsScheduler(
+            keys_counts={"validator0": 1, "validator1": 5, "validator2": 1},
+            capacity=10,
+        )
+        moves = scheduler.rebalance()
+        # the most loaded validator keeps the remainder
+        assert len(moves) == 2
+        assert scheduler.keys_counts == {
+            "validator0": 2,
+            "validator1": 3,
+            "validator2": 2,
+        }
+
+    def test_rebalance_balanced(self):
+        scheduler = ValidatorsScheduler(
+            keys_counts={"validator0": 3, "validator1": 2, "validator2": 3},
+            capacity=3,
+        )
+        assert scheduler.rebalance() == []
+        assert scheduler.place() == "validator1"
@@ -0,0 +1,126 @@
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+from click.testing import CliRunner
+from py_ecc.bls import G2ProofOfPossession
+from staking_deposit.key_handling.keystore import Pbkdf2Keystore, ScryptKeystore
+from web3 import Web3
+
+from stakewise_cli.commands.sync_local import sync_local
+from stakewise_cli.committee_shares import generate_bls_priv_key
+from stakewise_cli.eth2 import (
+    KDF_PBKDF2,
+    KDF_SCRYPT,
+    encrypt_keystore,
+    get_keystore_public_key,
+)
+from stakewise_cli.storages.local import LocalStorage
+from stakewise_cli.typings import SigningKey
+
+from .factories import faker
+
+
+@patch("stakewise_cli.commands.sync_local.LocalStorage")
+class TestCommand(unittest.TestCase):
+    def _call_command(self, args):
+        runner = CliRunner()
+        args = [
+            "--network",
+            "mainnet",
+            "--operator",
+            faker.eth_address(),
+        ] + args
+        return runner.invoke(sync_local, args)
+
+    def test_sync_local_invalid_scrypt_cost(self, storage_mock):
+        for args in [
+            ["--keystore-kdf-cost", "100000"],
+            ["--keystore-kdf-cost", "100000", "--keystore-kdf", KDF_SCRYPT],
+            ["--keystore-kdf", KDF_SCRYPT, "--keystore-kdf-cost", "100000"],
+        ]:
+            result = self._call_command(args)
+            assert result.exit_code == 2
+            assert "The scrypt KDF cost must be a power of 2" in result.output
+        storage_mock.assert_not_called()
+
+    def test_sync_local_pbkdf2_cost(self, storage_mock):
+        for args in [
+            ["--keystore-kdf-cost", "100000", "--keystore-kdf", KDF_PBKDF2],
+            ["--keystore-kdf", KDF_PBKDF2, "--keystore-kdf-cost", "100000"],
+        ]:
+            with patch("stakewise_cli.commands.sync_local.click.prompt"):
+                result = self._call_command(args)
+            assert result.exit_code == 0
+            assert storage_mock.call_args.kwargs["keystore_kdf_cost"] == 100000
+
+
+class TestEncryptKeystore(unittest.TestCase):
+    def test_encrypt_keystore_kdf_cost(self):
+        scrypt_params = dict(ScryptKeystore.crypto.kdf.params)
+        pbkdf2_params = dict(Pbkdf2Keystore.crypto.kdf.params)
+        private_key = generate_bls_priv_key()
+        for kdf, param, cost in [(KDF_SCRYPT, "n", 2**10), (KDF_PBKDF2, "c", 1000)]:
+            keystore = encrypt_keystore(
+                private_key=private_key,
+                password="password",
+                path="m/12381/3600/0/0/0",
+                kdf=kdf,
+                kdf_cost=cost,
+            )
+            assert json.loads(keystore)["crypto"]["kdf"]["params"][param] == cost
+            assert get_keystore_public_key(
+                keystore, "password"
+            ) == G2ProofOfPossession.SkToPk(private_key)
+
+        # the defaults shared by the keystores are not changed
+        assert ScryptKeystore.crypto.kdf.params == scrypt_params
+        assert Pbkdf2Keystore.crypto.kdf.params == pbkdf2_params
+
+
+signing_keys = [
+    SigningKey(path=f"m/12381/3600/{i}/0/0", key=generate_bls_priv_key())
+    for i in range(5)
+]
+
+
+@patch(
+    "stakewise_cli.storages.local.LocalStorage.get_or_create_keystore_password",
+    return_value="password",
+)
+@patch("stakewise_cli.storages.local.is_validator_registered", return_value=False)
+@patch(
+    "stakewise_cli.storages.local.get_mnemonic_signing_key",
+    side_effect=lambda mnemonic, index, is_legacy: signing_keys[index],
+)
+class TestDepositDataKeystores(unittest.TestCase):
+    def _get_deposit_data_keystores(self):
+        storage = LocalStorage.__new__(LocalStorage)
+        storage.mnemonic = "mnemonic"
+        storage.keystore_kdf = KDF_PBKDF2
+        storage.keystore_kdf_cost = 1000
+        storage.eth_gql_client = MagicMock()
+        # the last key is not in the deposit data
+        storage.operator_deposit_data_public_keys = set(
+            Web3.toHex(G2ProofOfPossession.SkToPk(signing_key.key))
+            for signing_key in signing_keys[:-1]
+        )
+        storage.local_public_keys = set()
+        with CliRunner().isolation():
+            return storage.deposit_data_keystores
+
+    def test_deposit_data_keystores_workers(self, *mocks):
+        # the keystores encrypted in parallel are in the order of the keys
+        for workers_count in [1, 3]:
+            with patch("stakewise_cli.storages.local.WORKERS_COUNT", workers_count):
+                keystores = list(self._get_deposit_data_keystores().values())
+
+            assert [json.loads(keystore)["path"] for keystore in keystores] == [
+                signing_key.path for signing_key in signing_keys[:-1]
+            ]
+            assert [
+                get_keystore_public_key(keystore, "password") for keystore in keystores
+            ] == [
+                G2ProofOfPossession.SkToPk(signing_key.key)
+                for signing_key in signing_keys[:-1]
+            ]
@@ -0,0 +1,85 @@
+import unittest
+from unittest.mock import patch
+
+from stakewise_cli.utils import OverlayDict, RateLimiter
+
+
+class TestOverlayDict(unittest.TestCase):
+    def setUp(self):
+        self.base = {"a": 1, "b": 2, "c": 3}
+        self.overlay = OverlayDict(self.base)
+
+    def test_read_base(self):
+        assert self.overlay["a"] == 1
+        assert "b" in self.overlay
+        assert "d" not in self.overlay
+        assert self.overlay.get("d") is None
+        with self.assertRaises(KeyError):
+            self.overlay["d"]
+        assert dict(self.overlay) == self.base
+
+    def test_write(self):
+        self.overlay["a"] = 10
+        self.overlay["d"] = 4
+        assert self.overlay["a"] == 10
+        assert self.overlay["d"] == 4
+        assert len(self.overlay) == 4
+        assert dict(self.overlay) == {"a": 10, "b": 2, "c": 3, "d": 4}
+        # the base is never modified
+        assert self.base == {"a": 1, "b": 2, "c": 3}
+
+    def test_delete(self):
+        del self.overlay["a"]
+        self.overlay["d"] = 4
+        del self.overlay["d"]
+        assert "a" not in self.overlay
+        assert "d" not in self.overlay
+        with self.assertRaises(KeyError):
+            self.overlay["a"]
+        with self.assertRaises(KeyError):
+            del self.overlay["a"]
+        with self.assertRaises(KeyError):
+            del self.overlay["e"]
+        assert len(self.overlay) == 2
+        assert dict(self.overlay) == {"b": 2, "c": 3}
+        assert self.base == {"a": 1, "b": 2, "c": 3}
+
+    def test_delete_overwritten(self):
+        self.overlay["b"] = 20
+        del self.overlay["b"]
+        assert "b" not in self.overlay
+        assert len(self.overlay) == 2
+
+        self.overlay["b"] = 200
+        assert self.overlay["b"] == 200
+        assert len(self.overlay) == 3
+
+    def test_iteration(self):
+        self.overlay["b"] = 20
+        self.overlay["d"] = 4
+        del self.overlay["c"]
+        assert list(self.overlay) == ["a", "b", "d"]
+        assert sorted(self.overlay.items()) == [("a", 1), ("b", 20), ("d", 4)]
+        assert len(self.overlay) == len(list(self.overlay))
+
+
+@patch("stakewise_cli.utils.time.sleep")
+@patch("stakewise_cli.utils.time.monotonic", return_value=100.0)
+class TestRateLimiter(unittest.TestCase):
+    def test_wait(self, monotonic_mock, sleep_mock):
+        rate_limiter = RateLimiter(10)
+        for _ in range(3):
+            rate_limiter.wait()
+        assert [round(c.args[0], 6) for c in sleep_mock.call_args_list] == [0.1, 0.2]
+
+        # the calls after the pause are not delayed
+        sleep_mock.reset_mock()
+        monotonic_mock.return_value = 200.0
+        rate_limiter.wait()
+        sleep_mock.assert_not_called()
+
+    def test_unlimited(self, monotonic_mock, sleep_mock):
+        rate_limiter = RateLimiter(0)
+        for _ in range(3):
+            rate_limiter.wait()
+        sleep_mock.assert_not_called()
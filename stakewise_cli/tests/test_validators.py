@@ -0,0 +1,49 @@
+import unittest
+
+import click
+
+from stakewise_cli.validators import validate_keys_shard, validate_validator_indexes
+
+
+class TestValidateValidatorIndexes(unittest.TestCase):
+    def test_valid(self):
+        assert validate_validator_indexes(None, None, None) is None
+        assert validate_validator_indexes(None, None, "") is None
+        assert validate_validator_indexes(None, None, "0") == [0]
+        assert validate_validator_indexes(None, None, "5,1, 3,1") == [1, 3, 5]
+
+    def test_invalid(self):
+        for value, error in [
+            ("1,a", "Invalid validator indexes"),
+            ("1;2", "Invalid validator indexes"),
+            ("1,,2", "Invalid validator indexes"),
+            ("1.5", "Invalid validator indexes"),
+            ("1,-1", "must not be negative"),
+        ]:
+            with self.assertRaises(click.BadParameter) as e:
+                validate_validator_indexes(None, None, value)
+            assert error in e.exception.message
+
+
+class TestValidateKeysShard(unittest.TestCase):
+    def test_valid(self):
+        assert validate_keys_shard(None, None, None) is None
+        assert validate_keys_shard(None, None, "0/1") == (0, 1)
+        assert validate_keys_shard(None, None, "2/3") == (2, 3)
+
+    def test_invalid(self):
+        for value, error in [
+            ("1", "Invalid shard"),
+            ("1/2/3", "Invalid shard"),
+            ("a/2", "Invalid shard"),
+            ("1/b", "Invalid shard"),
+            ("0.5/2", "Invalid shard"),
+            ("2/2", "Shard index must be in range"),
+            ("3/2", "Shard index must be in range"),
+            ("0/0", "Shard index must be in range"),
+            ("-1/2", "Shard index must be in range"),
+            ("0/-2", "Shard index must be in range"),
+        ]:
+            with self.assertRaises(click.BadParameter) as e:
+                validate_keys_shard(None, None, value)
+            assert error in e.exception.message
@@ -0,0 +1,528 @@
+import json
+import os
+import random
+import time
+import unittest
+from collections import OrderedDict
+from unittest.mock import MagicMock, patch
+
+import click
+from click.testing import CliRunner
+from eth_typing import HexStr
+from eth_utils import add_0x_prefix
+from hvac.exceptions import InvalidPath
+from py_ecc.bls import G2ProofOfPossession
+from web3 import Web3
+
+from stakewise_cli.committee_shares import generate_bls_priv_key
+from stakewise_cli.eth2 import KDF_PBKDF2, get_keystore_public_key
+from stakewise_cli.placement import ValidatorsScheduler
+from stakewise_cli.settings import VAULT_VALIDATORS_MOUNT_POINT
+from stakewise_cli.storages.vault import (
+    KEYSTORES_INDEX_SECRET,
+    KEYSTORES_LAYOUT_PER_KEYSTORE,
+    KEYSTORES_LAYOUT_SINGLE,
+    LEDGER_KEY_FILENAME,
+    VALIDATOR_POLICY,
+    Vault,
+    _get_keystore_hash,
+    _get_ledger_key,
+    _load_verified_keystores,
+    _save_verified_keystores,
+)
+from stakewise_cli.typings import SigningKey, VaultKeystore
+from stakewise_cli.utils import OverlayDict, get_digest
+
+from .factories import faker
+
+
+class TestRebalance(unittest.TestCase):
+    def setUp(self):
+        self.state = {
+            HexStr(faker.public_key()): VaultKeystore(
+                validator_name="validator0", keystore_name="", keystore=""
+            )
+            for _ in range(4)
+        }
+        self.scheduler = ValidatorsScheduler(
+            keys_counts={"validator0": 4, "validator1": 0}, capacity=10
+        )
+
+    def _get_rebalance_placements(self, input):
+        runner = CliRunner()
+        with runner.isolation(input=input) as (output, _):
+            try:
+                return Vault.get_rebalance_placements(
+                    MagicMock(), self.scheduler, self.state, []
+                )
+            finally:
+                self.output = output.getvalue().decode()
+
+    def test_rebalance_not_stopped(self):
+        with self.assertRaises(click.Abort):
+            self._get_rebalance_placements(input="\n")
+        assert "Stop validator0 before continuing" in self.output
+
+    def test_rebalance_stopped(self):
+        moved_keys = self._get_rebalance_placements(input="y\n")
+        assert len(moved_keys) == 2
+        assert all(to_name == "validator1" for _, to_name in moved_keys)
+        assert all(public_key in self.state for public_key, _ in moved_keys)
+
+
+class TestVerifiedKeystores(unittest.TestCase):
+    def test_keystore_hash(self):
+        keystore = json.dumps({"pubkey": faker.public_key()})
+        ledger_key = b"key"
+        path = "validator0/keystore0"
+        keystore_hash = _get_keystore_hash(ledger_key, path, keystore, "password")
+        assert (
+            _get_keystore_hash(ledger_key, path, keystore, "password") == keystore_hash
+        )
+        for args in [
+            (ledger_key, "validator1/keystore0", keystore, "password"),
+            (ledger_key, path, "{}", "password"),
+            # the password was rotated
+            (ledger_key, path, keystore, "new-password"),
+            (b"other-key", path, keystore, "password"),
+        ]:
+            assert _get_keystore_hash(*args) != keystore_hash
+
+        # the password is not recoverable without the ledger key
+        assert keystore_hash != get_digest(path, keystore, "password")
+
+    def test_ledger_key(self):
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            ledger_key = _get_ledger_key("ledger")
+            assert len(ledger_key) == 32
+            assert _get_ledger_key("ledger") == ledger_key
+            key_path = os.path.join("ledger", LEDGER_KEY_FILENAME)
+            assert os.stat(key_path).st_mode & 0o777 == 0o600
+
+    def test_save_verified_keystores_prunes(self):
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            ledger_path = os.path.join("ledger", "vault.json")
+            assert _load_verified_keystores(ledger_path) == set()
+
+            _save_verified_keystores(ledger_path, {"hash0", "hash1"})
+            assert _load_verified_keystores(ledger_path) == {"hash0", "hash1"}
+            _save_verified_keystores(ledger_path, {"hash1", "hash2"})
+            assert _load_verified_keystores(ledger_path) == {"hash1", "hash2"}
+
+    def test_ledger_path_per_vault(self):
+        def get_ledger_path(url, namespace):
+            vault = Vault.__new__(Vault)
+            vault.namespace = namespace
+            vault.vault_client = MagicMock(url=url)
+            return vault.verified_keystores_ledger_path
+
+        with patch(
+            "stakewise_cli.storages.vault.VERIFIED_KEYSTORES_LEDGER_DIR", "ledger"
+        ):
+            ledger_path = get_ledger_path("http://vault0:8200", "validators")
+            assert os.path.dirname(ledger_path) == "ledger"
+            assert get_ledger_path("http://vault0:8200", "validators") == ledger_path
+            assert get_ledger_path("http://vault1:8200", "validators") != ledger_path
+            assert get_ledger_path("http://vault0:8200", "operators") != ledger_path
+
+
+class FakeKV:
+    """Keeps the vault secrets in memory and records the writes."""
+
+    def __init__(self, secrets):
+        self.secrets = secrets
+        self.writes = []
+
+    def read_secret(self, path, mount_point):
+        if path not in self.secrets:
+            raise InvalidPath()
+        return {"data": self.secrets[path]}
+
+    def create_or_update_secret(self, path, secret, mount_point):
+        self.writes.append(("write", path))
+        self.secrets[path] = secret
+
+    def delete_secret(self, path, mount_point):
+        self.writes.append(("delete", path))
+        self.secrets.pop(path, None)
+
+
+def get_keystore():
+    return json.dumps({"pubkey": faker.public_key()[2:]})
+
+
+class TestPerKeystoreLayout(unittest.TestCase):
+    def setUp(self):
+        self.keystores = {f"keystore-{i}.json": get_keystore() for i in range(3)}
+
+    def _get_vault(self, secrets):
+        vault = Vault.__new__(Vault)
+        vault.keystores_layout = KEYSTORES_LAYOUT_PER_KEYSTORE
+        vault.validators_to_migrate = set()
+        vault.vault_validator_names = {"validator0"}
+        vault.vault_client = MagicMock()
+        vault.vault_client.secrets.kv = FakeKV(secrets)
+        return vault
+
+    def _get_per_keystore_secrets(self, keystores):
+        secrets = {
+            f"validator0/keystores/{name}": {name: keystore}
+            for name, keystore in keystores.items()
+        }
+        secrets[f"validator0/{KEYSTORES_INDEX_SECRET}"] = {
+            name: json.loads(keystore)["pubkey"] for name, keystore in keystores.items()
+        }
+        return secrets
+
+    def _sync(self, vault, new_keystores):
+        with CliRunner().isolation():
+            vault.vault_validators_keystores
+            vault.sync_vault_keystores_secrets({"validator0": new_keystores})
+        return vault.vault_client.secrets.kv.writes
+
+    def _read(self, vault):
+        with CliRunner().isolation():
+            return vault.read_validators_keystores({"validator0"}, label="")
+
+    def test_write_order(self):
+        vault = self._get_vault(self._get_per_keystore_secrets(self.keystores))
+        new_keystores = dict(self.keystores)
+        del new_keystores["keystore-0.json"]
+        new_keystores["keystore-1.json"] = get_keystore()
+        new_keystores["keystore-3.json"] = get_keystore()
+
+        writes = self._sync(vault, new_keystores)
+
+        # the keystores are written, then the index, then the stale keystores are deleted
+        assert sorted(writes[:2]) == [
+            ("write", "validator0/keystores/keystore-1.json"),
+            ("write", "validator0/keystores/keystore-3.json"),
+        ]
+        assert writes[2:] == [
+            ("write", f"validator0/{KEYSTORES_INDEX_SECRET}"),
+            ("delete", "validator0/keystores/keystore-0.json"),
+        ]
+        assert self._read(self._get_vault(vault.vault_client.secrets.kv.secrets)) == {
+            "validator0": new_keystores
+        }
+
+    def test_unchanged_keystores(self):
+        vault = self._get_vault(self._get_per_keystore_secrets(self.keystores))
+        writes = self._sync(vault, dict(self.keystores))
+        assert writes == [("write", f"validator0/{KEYSTORES_INDEX_SECRET}")]
+
+    def test_read_half_migrated(self):
+        # the sync stopped after writing the keystores, before writing the index
+        secrets = self._get_per_keystore_secrets(self.keystores)
+        del secrets[f"validator0/{KEYSTORES_INDEX_SECRET}"]
+        secrets["validator0/keystores"] = dict(self.keystores)
+        vault = self._get_vault(secrets)
+        assert self._read(vault) == {"validator0": self.keystores}
+        assert vault.validators_to_migrate == {"validator0"}
+
+        # the sync stopped after writing the index, before deleting the single secret
+        secrets = self._get_per_keystore_secrets(self.keystores)
+        secrets["validator0/keystores"] = {"keystore-0.json": get_keystore()}
+        vault = self._get_vault(secrets)
+        assert self._read(vault) == {"validator0": self.keystores}
+        assert vault.validators_to_migrate == set()
+
+    def test_read_index_with_missing_keystore(self):
+        secrets = self._get_per_keystore_secrets(self.keystores)
+        del secrets["validator0/keystores/keystore-1.json"]
+        with self.assertRaises(click.ClickException) as e:
+            self._read(self._get_vault(secrets))
+        assert "validator0/keystores/keystore-1.json" in e.exception.message
+
+    def test_migrate_single_secret(self):
+        vault = self._get_vault({"validator0/keystores": dict(self.keystores)})
+        writes = self._sync(vault, dict(self.keystores))
+
+        assert sorted(writes[:3]) == [
+            ("write", f"validator0/keystores/{name}") for name in sorted(self.keystores)
+        ]
+        assert writes[3:] == [
+            ("write", f"validator0/{KEYSTORES_INDEX_SECRET}"),
+            ("delete", "validator0/keystores"),
+        ]
+        assert vault.validators_to_migrate == set()
+        assert vault.vault_client.secrets.kv.secrets == self._get_per_keystore_secrets(
+            self.keystores
+        )
+
+
+def get_policy(validator_name):
+    return VALIDATOR_POLICY % (VAULT_VALIDATORS_MOUNT_POINT, validator_name)
+
+
+def get_role(validator_name, namespace="validators"):
+    return {
+        "bound_service_account_names": [validator_name],
+        "bound_service_account_namespaces": [namespace],
+        "token_policies": [validator_name],
+    }
+
+
+class TestSyncVaultValidators(unittest.TestCase):
+    validator_names = ["validator0", "validator1"]
+
+    def _get_vault(self, policies, roles):
+        vault = Vault.__new__(Vault)
+        vault.namespace = "validators"
+        vault.vault_validators_keystores = {}
+        state = {
+            HexStr(faker.public_key()): VaultKeystore(
+                validator_name=validator_name, keystore_name="", keystore=""
+            )
+            for validator_name in self.validator_names
+        }
+        vault.vault_current_state = state
+        vault.vault_new_state = OverlayDict(state)
+
+        client = MagicMock()
+        client.sys.list_policies.return_value = {
+            "data": {"policies": ["default", *policies]}
+        }
+        client.sys.read_policy.side_effect = lambda name: {
+            "data": {"rules": policies[name]}
+        }
+        client.auth.kubernetes.list_roles.return_value = {"keys": list(roles)}
+        client.auth.kubernetes.read_role.side_effect = lambda name: roles[name]
+        vault.vault_client = client
+        return vault
+
+    def _sync(self, vault):
+        with CliRunner().isolation():
+            vault.sync_vault_validators()
+        return vault.vault_client
+
+    def test_unchanged_validators(self):
+        client = self._sync(
+            self._get_vault(
+                policies={name: get_policy(name) for name in self.validator_names},
+                roles={name: get_role(name) for name in self.validator_names},
+            )
+        )
+        client.sys.create_or_update_policy.assert_not_called()
+        client.auth.kubernetes.create_role.assert_not_called()
+        client.sys.delete_policy.assert_not_called()
+        client.delete_kubernetes_role.assert_not_called()
+
+    def test_changed_validators(self):
+        client = self._sync(
+            self._get_vault(
+                policies={"validator0": get_policy("validator0")},
+                roles={
+                    "validator0": get_role("validator0"),
+                    "validator1": get_role("validator1", namespace="operators"),
+                },
+            )
+        )
+        client.sys.create_or_update_policy.assert_called_once_with(
+            name="validator1", policy=get_policy("validator1")
+        )
+        client.auth.kubernetes.create_role.assert_called_once_with(
+            name="validator1",
+            policies=["validator1"],
+            bound_service_account_names="validator1",
+            bound_service_account_namespaces="validators",
+        )
+
+    def test_missing_kubernetes_auth(self):
+        vault = self._get_vault(
+            policies={name: get_policy(name) for name in self.validator_names},
+            roles={},
+        )
+        vault.vault_client.auth.kubernetes.list_roles.side_effect = InvalidPath()
+        client = self._sync(vault)
+        assert [
+            c.kwargs["name"] for c in client.auth.kubernetes.create_role.call_args_list
+        ] == self.validator_names
+
+    def test_is_kubernetes_role_valid(self):
+        vault = self._get_vault(policies={}, roles={})
+        assert vault.is_kubernetes_role_valid("validator0", get_role("validator0"))
+        # the roles created by the previous versions have the policies only
+        role = get_role("validator0")
+        role["policies"] = role.pop("token_policies")
+        assert vault.is_kubernetes_role_valid("validator0", role)
+        for role in [
+            get_role("validator1"),
+            get_role("validator0", namespace="operators"),
+            dict(get_role("validator0"), token_policies=["validator0", "validator1"]),
+            {},
+        ]:
+            assert not vault.is_kubernetes_role_valid("validator0", role)
+
+    @patch("stakewise_cli.utils.time.sleep")
+    @patch("stakewise_cli.storages.vault.VAULT_RATE_LIMIT", 10)
+    def test_send_requests_rate_limit(self, sleep_mock):
+        vault = Vault.__new__(Vault)
+        func = MagicMock()
+        with CliRunner().isolation():
+            vault.send_requests([(func, dict(name=i)) for i in range(5)], label="")
+
+        assert sorted(c.kwargs["name"] for c in func.call_args_list) == list(range(5))
+        # the concurrent requests are spread by the rate limit interval
+        assert sleep_mock.call_count == 4
+        assert max(c.args[0] for c in sleep_mock.call_args_list) <= 0.4
+
+
+class TestSyncVaultKeystores(unittest.TestCase):
+    def setUp(self):
+        self.keystores = {
+            f"validator{i}": {
+                f"keystore-{i}-{j}.json": get_keystore() for j in range(2)
+            }
+            for i in range(3)
+        }
+        self.vault = Vault.__new__(Vault)
+        self.vault.keystores_layout = KEYSTORES_LAYOUT_SINGLE
+        self.vault.vault_validators_keystores = {
+            validator_name: dict(keystores)
+            for validator_name, keystores in self.keystores.items()
+        }
+        self.vault.vault_current_state = {
+            add_0x_prefix(json.loads(keystore)["pubkey"]): VaultKeystore(
+                validator_name=validator_name,
+                keystore_name=keystore_name,
+                keystore=keystore,
+            )
+            for validator_name, keystores in self.keystores.items()
+            for keystore_name, keystore in keystores.items()
+        }
+        self.vault.vault_new_state = OverlayDict(self.vault.vault_current_state)
+        self.vault.vault_client = MagicMock()
+
+    def _sync(self):
+        with CliRunner().isolation():
+            self.vault.sync_vault_keystores()
+        return {
+            c.kwargs["path"]: c.kwargs["secret"]
+            for c in self.vault.vault_client.secrets.kv.create_or_update_secret.call_args_list
+        }
+
+    def test_unchanged_validators(self):
+        assert self._sync() == {}
+
+    def test_changed_validators(self):
+        new_state = self.vault.vault_new_state
+        # the key is moved from validator0 to validator1
+        public_key, vault_keystore = next(iter(self.vault.vault_current_state.items()))
+        new_state[public_key] = VaultKeystore(
+            validator_name="validator1",
+            keystore_name=vault_keystore["keystore_name"],
+            keystore=vault_keystore["keystore"],
+        )
+        # the key is added to validator1
+        new_keystore = get_keystore()
+        new_state[add_0x_prefix(json.loads(new_keystore)["pubkey"])] = VaultKeystore(
+            validator_name="validator1",
+            keystore_name="keystore-new.json",
+            keystore=new_keystore,
+        )
+
+        validator0_keystores = dict(self.keystores["validator0"])
+        del validator0_keystores[vault_keystore["keystore_name"]]
+        assert self._sync() == {
+            "validator0/keystores": validator0_keystores,
+            "validator1/keystores": {
+                **self.keystores["validator1"],
+                vault_keystore["keystore_name"]: vault_keystore["keystore"],
+                "keystore-new.json": new_keystore,
+            },
+        }
+
+
+@patch(
+    "stakewise_cli.storages.vault.Vault.get_or_create_keystore_password",
+    side_effect=lambda validator_name: f"{validator_name}-password",
+)
+class TestVaultNewState(unittest.TestCase):
+    signing_keys = [
+        SigningKey(path=f"m/12381/3600/{i}/0/0", key=generate_bls_priv_key())
+        for i in range(5)
+    ]
+
+    def _get_vault_new_state(self):
+        vault = Vault.__new__(Vault)
+        vault.rebalance = False
+        vault.max_keys_per_validator = 2
+        vault.keystore_kdf = KDF_PBKDF2
+        vault.keystore_kdf_cost = 1000
+        vault.vault_current_state = {}
+        vault.operator_exited_public_keys = set()
+        vault.vault_missing_keypairs = OrderedDict(
+            (
+                HexStr(Web3.toHex(G2ProofOfPossession.SkToPk(signing_key.key))),
+                signing_key,
+            )
+            for signing_key in self.signing_keys
+        )
+        with CliRunner().isolation():
+            return vault.vault_new_state
+
+    def test_vault_new_state_workers(self, *mocks):
+        # the keystores encrypted in parallel are placed as the sequential ones
+        placements = None
+        for workers_count in [1, 3]:
+            with patch("stakewise_cli.storages.vault.WORKERS_COUNT", workers_count):
+                new_state = self._get_vault_new_state()
+
+            assert list(new_state) == [
+                Web3.toHex(G2ProofOfPossession.SkToPk(signing_key.key))
+                for signing_key in self.signing_keys
+            ]
+            new_placements = [
+                vault_keystore["validator_name"]
+                for vault_keystore in new_state.values()
+            ]
+            assert placements is None or new_placements == placements
+            placements = new_placements
+
+            for public_key, vault_keystore in new_state.items():
+                keystore = vault_keystore["keystore"]
+                password = f"{vault_keystore['validator_name']}-password"
+                assert (
+                    Web3.toHex(get_keystore_public_key(keystore, password))
+                    == public_key
+                )
+
+
+class DelayedFakeKV(FakeKV):
+    """Answers the reads with the random delays, so that the concurrent reads are reordered."""
+
+    def read_secret(self, path, mount_point):
+        time.sleep(random.random() / 100)
+        return super().read_secret(path, mount_point)
+
+
+class TestReadSecrets(unittest.TestCase):
+    def setUp(self):
+        self.secrets = {
+            f"validator{i}/password": {"password.txt": f"password{i}"}
+            for i in range(20)
+            if i % 3
+        }
+
+    def _read_passwords(self):
+        vault = Vault.__new__(Vault)
+        vault.vault_validator_names = {f"validator{i}" for i in range(20)}
+        vault.vault_client = MagicMock()
+        vault.vault_client.secrets.kv = DelayedFakeKV(dict(self.secrets))
+        with CliRunner().isolation():
+            return vault.vault_validators_passwords
+
+    def test_read_secrets_concurrently(self):
+        with patch("stakewise_cli.storages.vault.VAULT_CONCURRENCY", 1):
+            passwords = self._read_passwords()
+        with patch("stakewise_cli.storages.vault.VAULT_CONCURRENCY", 8):
+            concurrent_passwords = self._read_passwords()
+
+        # the missing secrets are skipped and the rest keep the validators order
+        assert list(concurrent_passwords.items()) == list(passwords.items())
+        assert passwords == {
+            f"validator{i}": f"password{i}" for i in sorted(range(20), key=str) if i % 3
+        }
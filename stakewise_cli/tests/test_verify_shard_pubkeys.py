@@ -0,0 +1,233 @@
+import unittest
+from unittest.mock import patch
+
+from click.testing import CliRunner
+from eth_typing import BLSPubkey
+from py_ecc.bls import G2ProofOfPossession
+from py_ecc.bls.g2_primitives import G1_to_pubkey, pubkey_to_G1, subgroup_check
+from py_ecc.fields import optimized_bls12_381_FQ as FQ
+from py_ecc.optimized_bls12_381 import (
+    G1,
+    Z1,
+    add,
+    b,
+    curve_order,
+    field_modulus,
+    is_inf,
+    multiply,
+)
+from web3 import Web3
+
+from stakewise_cli.commands.verify_shard_pubkeys import verify_shard_pubkeys
+from stakewise_cli.committee_shares import (
+    generate_bls_priv_key,
+    get_bls_secret_shares,
+    is_in_g1_subgroup,
+)
+
+from .factories import faker
+
+w3 = Web3()
+
+keys_count = 3
+members_count = 5
+deposit_data_ipfs_hash = "/ipfs/" + faker.text(max_nb_chars=20)
+private_keys = [generate_bls_priv_key() for _ in range(keys_count)]
+members_private_keys = list(
+    zip(
+        *[
+            get_bls_secret_shares(private_key, total=members_count, threshold=3)
+            for private_key in private_keys
+        ]
+    )
+)
+shards_ipfs_data = {
+    f"/ipfs/shard{i}": [
+        w3.toHex(G2ProofOfPossession.SkToPk(key)) for key in members_private_keys[i]
+    ]
+    for i in range(members_count)
+}
+deposit_data = [
+    {"public_key": w3.toHex(G2ProofOfPossession.SkToPk(key))} for key in private_keys
+]
+
+# the cofactor of the BLS12-381 G1 group
+G1_COFACTOR = 0x396C8C005555E1568C00AAAB0000AAAB
+
+
+def get_curve_point(x=0):
+    """Returns the point of the curve with the smallest x coordinate above x."""
+    while True:
+        x += 1
+        rhs = FQ(x) ** 3 + b
+        y = rhs ** ((field_modulus + 1) // 4)
+        if y * y == rhs:
+            return x, (FQ(x), y, FQ.one())
+
+
+def get_torsion_point():
+    """Returns the point of order 3 outside of the G1 subgroup."""
+    x = 0
+    while True:
+        x, point = get_curve_point(x)
+        point = multiply(point, curve_order * G1_COFACTOR // 3)
+        if not is_inf(point):
+            return point
+
+
+def fetch_ipfs_data(ipfs_hash):
+    if ipfs_hash == deposit_data_ipfs_hash:
+        return deposit_data
+    return shards_ipfs_data[ipfs_hash]
+
+
+@patch(
+    "stakewise_cli.commands.verify_shard_pubkeys.ipfs_fetch",
+    side_effect=fetch_ipfs_data,
+)
+class TestCommand(unittest.TestCase):
+    def _call_command(self, indexes, fast=False):
+        runner = CliRunner()
+        args = [
+            "--deposit-data-ipfs-hash",
+            deposit_data_ipfs_hash,
+            "--shards-count",
+            len(indexes),
+        ]
+        if fast:
+            args.append("--fast")
+        prompt_input = "".join(f"{i}\n/ipfs/shard{i}\n" for i in indexes)
+        return runner.invoke(verify_shard_pubkeys, args, input=prompt_input)
+
+    def test_verify_shard_pubkeys(self, *mocks):
+        result = self._call_command([4, 0, 2])
+        assert result.exit_code == 0
+        assert "Successfully verified operator shards" in result.output
+
+    def test_verify_shard_pubkeys_non_interactive(self, fetch_mock):
+        runner = CliRunner()
+        args = [
+            "--deposit-data-ipfs-hash",
+            deposit_data_ipfs_hash,
+            "--shards",
+            "0=/ipfs/shard0,3=/ipfs/shard3,4=/ipfs/shard4",
+        ]
+        result = runner.invoke(verify_shard_pubkeys, args)
+        assert result.exit_code == 0
+        assert "Successfully verified operator shards" in result.output
+        assert fetch_mock.call_count == 4
+
+    def test_verify_shard_pubkeys_invalid_shards(self, fetch_mock):
+        runner = CliRunner()
+        for args, error in [
+            (
+                ["--shards", "-1=/ipfs/shard0,3=/ipfs/shard3,4=/ipfs/shard4"],
+                "Invalid committee member position -1",
+            ),
+            (
+                [
+                    "--shards-count",
+                    "2",
+                    "--shards",
+                    "0=/ipfs/shard0,3=/ipfs/shard3,4=/ipfs/shard4",
+                ],
+                "Got 3 shards, but the shards count is 2",
+            ),
+            (
+                [
+                    "--shards",
+                    "0=/ipfs/shard0,3=/ipfs/shard3,4=/ipfs/shard4",
+                    "--shards-count",
+                    "4",
+                ],
+                "Got 3 shards, but the shards count is 4",
+            ),
+        ]:
+            result = runner.invoke(
+                verify_shard_pubkeys,
+                ["--deposit-data-ipfs-hash", deposit_data_ipfs_hash] + args,
+            )
+            assert result.exit_code == 2
+            assert error in result.output
+        fetch_mock.assert_not_called()
+
+    def test_verify_shard_pubkeys_shards_count(self, fetch_mock):
+        runner = CliRunner()
+        args = [
+            "--deposit-data-ipfs-hash",
+            deposit_data_ipfs_hash,
+            "--shards",
+            "0=/ipfs/shard0,3=/ipfs/shard3,4=/ipfs/shard4",
+            "--shards-count",
+            "3",
+        ]
+        result = runner.invoke(verify_shard_pubkeys, args)
+        assert result.exit_code == 0
+        assert "Successfully verified operator shards" in result.output
+
+    def test_verify_shard_pubkeys_fast(self, *mocks):
+        result = self._call_command([3, 1, 0], fast=True)
+        assert result.exit_code == 0
+        assert "Successfully verified operator shards" in result.output
+
+    def test_verify_shard_pubkeys_invalid(self, *mocks):
+        self._call_command_with_invalid_shard(fast=False)
+
+    def test_verify_shard_pubkeys_fast_invalid(self, *mocks):
+        self._call_command_with_invalid_shard(fast=True)
+
+    def _call_command_with_invalid_shard(self, fast):
+        with patch.dict(
+            shards_ipfs_data,
+            {
+                "/ipfs/shard1": shards_ipfs_data["/ipfs/shard1"][:1]
+                + shards_ipfs_data["/ipfs/shard3"][1:2]
+                + shards_ipfs_data["/ipfs/shard1"][2:]
+            },
+        ):
+            result = self._call_command([1, 2, 4], fast=fast)
+        assert result.exit_code == 1
+        assert "Failed to reconstruct public key with index 1" in result.output
+
+    def test_verify_shard_pubkeys_fast_torsion(self, *mocks):
+        # the torsion component is not detected by the random linear combination
+        # for the weights divisible by the order of the component
+        shard_key = shards_ipfs_data["/ipfs/shard1"][1]
+        torsion_shard_key = w3.toHex(
+            G1_to_pubkey(
+                add(
+                    pubkey_to_G1(BLSPubkey(w3.toBytes(hexstr=shard_key))),
+                    get_torsion_point(),
+                )
+            )
+        )
+        with patch.dict(
+            shards_ipfs_data,
+            {
+                "/ipfs/shard1": shards_ipfs_data["/ipfs/shard1"][:1]
+                + [torsion_shard_key]
+                + shards_ipfs_data["/ipfs/shard1"][2:]
+            },
+        ):
+            result = self._call_command([1, 2, 4], fast=True)
+        assert result.exit_code == 1
+        assert "Failed to reconstruct public key with index 1" in result.output
+
+
+class TestSubgroupCheck(unittest.TestCase):
+    def test_is_in_g1_subgroup(self):
+        assert is_in_g1_subgroup(Z1)
+        for private_key in private_keys:
+            assert is_in_g1_subgroup(multiply(G1, private_key))
+
+    def test_is_not_in_g1_subgroup(self):
+        _, point = get_curve_point()
+        # the torsion components of the orders dividing the cofactor
+        torsion_points = [get_torsion_point(), multiply(point, curve_order)]
+        points = [point]
+        for torsion_point in torsion_points:
+            points.extend([torsion_point, add(G1, torsion_point)])
+
+        for point in points:
+            assert not subgroup_check(point)
+            assert not is_in_g1_subgroup(point)
@@ -24,6 +24,7 @@ class MerkleDepositData(TypedDict):
 
 class VaultKeystore(TypedDict):
     validator_name: str
+    keystore_name: str
     keystore: str
 
 
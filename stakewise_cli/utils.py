@@ -1,6 +1,24 @@
 import collections
+import hashlib
+import threading
+import time
 from base64 import b64decode, b64encode
-from typing import List
+from os import replace
+from typing import (
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Set,
+    TypeVar,
+)
+
+T = TypeVar("T")
+K = TypeVar("K")
+V = TypeVar("V")
 
 
 def is_lists_equal(x: List, y: List) -> bool:
@@ -13,3 +31,104 @@ def bytes_to_str(value: bytes) -> str:
 
 def str_to_bytes(value: str) -> bytes:
     return b64decode(value)
+
+
+def get_digest(*values: str) -> str:
+    """Returns the SHA-256 hex digest of the values."""
+    digest = hashlib.sha256()
+    for value in values:
+        digest.update(value.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def load_digest(file_path: str) -> Optional[str]:
+    """Loads the digest saved by the previous run."""
+    try:
+        with open(file_path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def save_digest(file_path: str, digest: str) -> None:
+    """Saves the digest atomically."""
+    write_file_atomically(file_path, digest)
+
+
+def write_file_atomically(file_path: str, data: str) -> None:
+    """Writes to the temporary file first, so that the readers never see partial files."""
+    with open(f"{file_path}.tmp", "w") as f:
+        f.write(data)
+    replace(f"{file_path}.tmp", file_path)
+
+
+def chunkify(items: Sequence[T], size: int) -> Iterator[Sequence[T]]:
+    """Splits items into consecutive chunks of the specified size."""
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+class RateLimiter(object):
+    """Limits the number of calls per second shared between the threads."""
+
+    def __init__(self, max_calls_per_second: float):
+        self.interval = 1 / max_calls_per_second if max_calls_per_second > 0 else 0
+        self.next_call_time = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        """Blocks until the next call is allowed."""
+        with self.lock:
+            now = time.monotonic()
+            call_time = max(now, self.next_call_time)
+            self.next_call_time = call_time + self.interval
+
+        if call_time > now:
+            time.sleep(call_time - now)
+
+
+class OverlayDict(MutableMapping[K, V]):
+    """
+    Copy-on-write mapping that records additions and removals
+    over the read-only base mapping instead of copying it.
+    """
+
+    def __init__(self, base: Mapping[K, V]):
+        self.base = base
+        # new and overwritten entries
+        self.added: Dict[K, V] = {}
+        # base keys that are hidden, including the overwritten ones
+        self.removed: Set[K] = set()
+
+    def __getitem__(self, key: K) -> V:
+        if key in self.added:
+            return self.added[key]
+        if key in self.removed:
+            raise KeyError(key)
+        return self.base[key]
+
+    def __setitem__(self, key: K, value: V) -> None:
+        self.added[key] = value
+        if key in self.base:
+            self.removed.add(key)
+
+    def __delitem__(self, key: K) -> None:
+        if key in self.added:
+            del self.added[key]
+        elif key in self.base and key not in self.removed:
+            self.removed.add(key)
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.added or (key in self.base and key not in self.removed)
+
+    def __iter__(self) -> Iterator[K]:
+        for key in self.base:
+            if key not in self.removed:
+                yield key
+        yield from self.added
+
+    def __len__(self) -> int:
+        return len(self.base) - len(self.removed) + len(self.added)
@@ -17,12 +17,87 @@ def validate_db_uri(ctx, param, value):
     return value
 
 
+def validate_db_uris(ctx, param, value):
+    for db_uri in value:
+        validate_db_uri(ctx, param, db_uri)
+    return value
+
+
 def validate_env_name(ctx, param, value):
     if not os.getenv(value):
         raise click.BadParameter(f"Empty environment variable {value}")
     return value
 
 
+def validate_optional_env_name(ctx, param, value):
+    if value is None:
+        return None
+    return validate_env_name(ctx, param, value)
+
+
+def validate_shards(ctx, param, value):
+    if not value:
+        return None
+
+    shards = {}
+    try:
+        for item in value.split(","):
+            position, ipfs_hash = item.split("=")
+            index = int(position.strip())
+            if index < 0:
+                raise click.BadParameter(
+                    f"Invalid committee member position {index}, must not be negative"
+                )
+            if index in shards:
+                raise click.BadParameter(f"Duplicate committee member position {index}")
+            shards[index] = ipfs_hash.strip()
+    except ValueError:
+        raise click.BadParameter(
+            "Invalid shards, must be in format 'index=ipfs_hash,index=ipfs_hash'"
+        )
+
+    # the shards count option is eager and is already processed
+    shards_count = ctx.params.get("shards_count")
+    if shards_count is not None and shards_count != len(shards):
+        raise click.BadParameter(
+            f"Got {len(shards)} shards, but the shards count is {shards_count}"
+        )
+
+    return shards
+
+
+def validate_validator_indexes(ctx, param, value):
+    if not value:
+        return None
+
+    try:
+        validator_indexes = sorted(set(int(item) for item in value.split(",")))
+    except ValueError:
+        raise click.BadParameter(
+            "Invalid validator indexes, must be in format 'index,index'"
+        )
+
+    if validator_indexes[0] < 0:
+        raise click.BadParameter("Validator indexes must not be negative")
+
+    return validator_indexes
+
+
+def validate_keys_shard(ctx, param, value):
+    if not value:
+        return None
+
+    try:
+        index, count = (int(item) for item in value.split("/"))
+    except ValueError:
+        raise click.BadParameter("Invalid shard, must be in format 'index/count'")
+
+    if not 0 <= index < count:
+        raise click.BadParameter("Shard index must be in range from 0 to count - 1")
+
+    return index, count
+
+
 # click prompts
 def validate_operator_address_prompt(value):
     try:
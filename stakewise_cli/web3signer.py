@@ -1,7 +1,7 @@
 import math
 from collections import OrderedDict
 from functools import cached_property
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set
 
 import click
 from eth_typing import ChecksumAddress, HexStr
@@ -30,6 +30,7 @@ class Web3SignerManager:
         mnemonic: str,
         validator_capacity: int,
         beacon: Beacon,
+        encryption_key: Optional[str] = None,
     ):
         self.sw_gql_client = get_stakewise_gql_client(network)
         self.eth_gql_client = get_ethereum_gql_client(network)
@@ -38,7 +39,7 @@ class Web3SignerManager:
         self.mnemonic = mnemonic
         self.validator_capacity = validator_capacity
         self.operator_address = operator
-        self.encoder = Encoder()
+        self.encoder = Encoder(cipher_key=encryption_key)
 
     @cached_property
     def keys(self) -> List[DatabaseKeyRecord]: